@@ -0,0 +1,5 @@
+"""Outils YOOMI : synchronisation Shopify et génération d'étiquettes.
+
+Ce paquet ne dépend pas de Streamlit : il est partagé par l'application
+(``label_creator.py``) et les scripts en ligne de commande.
+"""
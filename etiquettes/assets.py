@@ -0,0 +1,103 @@
+"""
+Fichiers du dépôt (polices, images, icônes), enregistrement des polices ReportLab
+et cache des icônes dessinées sur les étiquettes.
+"""
+import os
+import threading
+from functools import lru_cache
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Racine du dépôt : les chemins ne dépendent pas du dossier courant (cron, workers)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FONT_FILES = {
+    "NotoSans-Italic": "NotoSans-Italic.ttf",
+    "AdobeSansMM": "adobe-sans-mm.ttf",
+    "IbarraRealNova-Bold": "IbarraRealNova-Bold.ttf",
+    "IbarraRealNova-Regular": "IbarraRealNova-Regular.ttf",
+    "IbarraRealNova-SemiBold": "IbarraRealNova-SemiBold.ttf",
+    "BellCentennial": "BellCentennialStd-Address.ttf",
+    "BellCentennialName": "BellCentennialStd-NameNum.ttf",
+    "BellCentennial-Bold": "BellCentennialStd-NameNum.ttf",
+}
+
+
+def asset_path(*parts) -> str:
+    """'icones', 'logo.png' -> chemin absolu dans le dépôt."""
+    return os.path.join(ROOT, *parts)
+
+
+_registered = set()
+_fonts_lock = threading.Lock()
+
+
+def register_fonts(names=None):
+    """
+    Enregistre les polices demandées (toutes par défaut). Chaque TTF n'est lu qu'une
+    fois par processus ; les appels suivants (reruns Streamlit) ne coûtent qu'un test.
+    Sert aussi d'``initializer`` pour précharger les polices dans les processus de rendu.
+    """
+    names = list(FONT_FILES) if names is None else list(names)
+    if _registered.issuperset(names):
+        return
+    with _fonts_lock:
+        already = set(pdfmetrics.getRegisteredFontNames())
+        for name in names:
+            if name not in _registered and name not in already:
+                pdfmetrics.registerFont(TTFont(name, asset_path("fonts", FONT_FILES[name])))
+            _registered.add(name)
+
+
+# Résolution d'impression des icônes : les PNG sources (jusqu'à 4000 px) sont réduits une fois
+ICON_DPI = 300
+
+
+@lru_cache(maxsize=64)
+def _icon_reader(path: str, mtime: float, max_px: int) -> ImageReader:
+    image = Image.open(path)
+    image.load()
+    if image.mode in ("RGBA", "LA", "P"):
+        # fond blanc, comme le rendu d'origine des PNG transparents
+        image = image.convert("RGBA")
+        flat = Image.new("RGB", image.size, "white")
+        flat.paste(image, mask=image.getchannel("A"))
+        image = flat
+    if max(image.size) > max_px:
+        image.thumbnail((max_px, max_px), Image.LANCZOS)
+    return ImageReader(image)
+
+
+def icon_reader(path: str, width: float, height: float) -> ImageReader:
+    """Image décodée une fois par processus (clé : chemin + date de modification)."""
+    max_px = int(max(width, height) / 72 * ICON_DPI) + 1
+    return _icon_reader(path, os.path.getmtime(path), max_px)
+
+
+class DocumentIcons:
+    """
+    Icônes d'un PDF : chaque (image, taille) est enregistrée une seule fois dans le
+    document comme XObject partagé, puis simplement référencée à chaque étiquette.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._forms = {}
+
+    def draw(self, path: str, x: float, y: float, width: float, height: float, preserveAspectRatio: bool = True):
+        key = (path, width, height, preserveAspectRatio)
+        name = self._forms.get(key)
+        if name is None:
+            reader = icon_reader(path, width, height)
+            name = f"icon{len(self._forms)}"
+            self.canvas.beginForm(name)
+            self.canvas.drawImage(reader, 0, 0, width=width, height=height, preserveAspectRatio=preserveAspectRatio)
+            self.canvas.endForm()
+            self._forms[key] = name
+        self.canvas.saveState()
+        self.canvas.translate(x, y)
+        self.canvas.doForm(name)
+        self.canvas.restoreState()
@@ -0,0 +1,112 @@
+"""
+Index barcode -> variante Shopify (produit, variante, inventory_item_id, titre, prix).
+
+Construit une fois depuis la table ``variants`` de la base locale ; si elle est
+encore vide, une seule lecture paginée de Shopify la remplit. Les recherches
+sont ensuite en O(1) et sans appel API. L'index expire après ``ttl`` secondes
+et peut être invalidé explicitement (après une synchro ou une création).
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from . import store
+from .catalog import normalize_barcode, variant_rows
+
+DEFAULT_TTL = 600
+
+
+@dataclass(frozen=True)
+class VariantRef:
+    barcode: str
+    product_id: int
+    variant_id: int
+    inventory_item_id: int
+    title: str
+    variant_title: str
+    price: str
+
+
+def _int_or_none(value):
+    return None if pd.isna(value) else int(value)
+
+
+class BarcodeIndex:
+    def __init__(self, variants: pd.DataFrame):
+        self.built_at = time.monotonic()
+        self._by_barcode = {}
+        for row in variants.itertuples(index=False):
+            barcode = normalize_barcode(row.barcode)
+            if not barcode or barcode in self._by_barcode:
+                continue  # premier trouvé conservé, comme l'ancienne recherche linéaire
+            self._by_barcode[barcode] = VariantRef(
+                barcode=barcode,
+                product_id=_int_or_none(row.product_id),
+                variant_id=_int_or_none(row.variant_id),
+                inventory_item_id=_int_or_none(row.inventory_item_id),
+                title=row.title,
+                variant_title=row.variant_title,
+                price=row.price,
+            )
+
+    def __len__(self):
+        return len(self._by_barcode)
+
+    def __contains__(self, barcode):
+        return normalize_barcode(barcode) in self._by_barcode
+
+    def get(self, barcode) -> VariantRef:
+        return self._by_barcode.get(normalize_barcode(barcode))
+
+    def barcodes(self) -> set:
+        return set(self._by_barcode)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Colonnes attendues par l'onglet stock fournisseur (fusion sur « Barcode »)."""
+        return pd.DataFrame(
+            [
+                {
+                    "Product Title": ref.title,
+                    "Variant Title": ref.variant_title,
+                    "Barcode": ref.barcode,
+                    "Variant ID": ref.variant_id,
+                    "Inventory Item ID": ref.inventory_item_id,
+                }
+                for ref in self._by_barcode.values()
+            ],
+            columns=["Product Title", "Variant Title", "Barcode", "Variant ID", "Inventory Item ID"],
+        )
+
+
+def fetch_variants_into_store(client, db_path: str = store.DB_PATH):
+    """Remplit la table ``variants`` depuis une lecture paginée de Shopify."""
+    rows = []
+    for page in client.paginate("products.json", {"fields": "id,title,tags,variants", "limit": 250}):
+        for p in page.get("products", []):
+            rows.extend(variant_rows(p))
+    store.apply_variant_changes(rows, replace_all=True, db_path=db_path)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_barcode_index(client=None, db_path: str = store.DB_PATH, ttl: float = DEFAULT_TTL) -> BarcodeIndex:
+    """Index partagé par tout le processus ; reconstruit après ``ttl`` secondes ou invalidation."""
+    global _index
+    with _index_lock:
+        if _index is None or time.monotonic() - _index.built_at > ttl:
+            variants = store.load_variants(db_path)
+            if variants.empty and client is not None:
+                fetch_variants_into_store(client, db_path)
+                variants = store.load_variants(db_path)
+            _index = BarcodeIndex(variants)
+        return _index
+
+
+def invalidate_barcode_index():
+    global _index
+    with _index_lock:
+        _index = None
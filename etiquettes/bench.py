@@ -0,0 +1,760 @@
+"""
+Mesures de performance reproductibles (hors Streamlit).
+
+    python -m etiquettes.bench polices
+
+Chaque mesure compare l'ancien comportement de l'application au nouveau.
+Les mesures qui vérifient aussi un résultat (``prix``, ``bulk``...) sortent en
+erreur (code 1) au moindre écart.
+"""
+import argparse
+import math
+import re
+import statistics
+import subprocess
+import sys
+import time
+from decimal import ROUND_CEILING, ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from .assets import FONT_FILES, ROOT, asset_path, register_fonts
+from .catalog import CSV_PATH
+
+
+def _median_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _cold_ms(code: str, repeat: int) -> float:
+    """Durée médiane de ``code`` dans un processus neuf (imports inclus dans le code mesuré)."""
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", f"import time; _t = time.perf_counter()\n{code}\nprint(time.perf_counter() - _t)"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings) * 1000
+
+
+def _print_table(title: str, rows):
+    print(f"\n{title}")
+    width = max(len(label) for label, _ in rows)
+    for label, ms in rows:
+        print(f"  {label:<{width}}  {ms:10.3f} ms")
+
+
+def bench_fonts(repeat: int = 5):
+    """Polices : démarrage à froid et coût par rerun, avant / après le registre."""
+    from .price_labels import FONTS
+
+    legacy_fonts = [n for n in FONT_FILES if n != "BellCentennial-Bold"]
+
+    def legacy_rerun():
+        # Ancien script : 7 registerFont(TTFont(...)) à chaque exécution (chaque interaction)
+        for name in legacy_fonts:
+            pdfmetrics.registerFont(TTFont(name, asset_path("fonts", FONT_FILES[name])))
+
+    legacy_code = (
+        "from reportlab.pdfbase import pdfmetrics\n"
+        "from reportlab.pdfbase.ttfonts import TTFont\n"
+        "from etiquettes.assets import FONT_FILES, asset_path\n"
+        f"for n in {legacy_fonts!r}:\n"
+        "    pdfmetrics.registerFont(TTFont(n, asset_path('fonts', FONT_FILES[n])))"
+    )
+    _print_table("Polices — démarrage à froid (processus neuf)", [
+        ("avant : 7 polices au chargement du script", _cold_ms(legacy_code, repeat)),
+        ("après : aucune police tant qu'on n'imprime pas", _cold_ms("import etiquettes.assets", repeat)),
+        ("après : polices des étiquettes prix, 1re impression",
+         _cold_ms(f"from etiquettes.assets import register_fonts\nregister_fonts({FONTS!r})", repeat)),
+    ])
+
+    register_fonts(FONTS)
+    _print_table("Polices — coût par rerun Streamlit (processus chaud)", [
+        ("avant : ré-enregistrement des 7 TTF", _median_ms(legacy_rerun, repeat)),
+        ("après : register_fonts() déjà fait", _median_ms(lambda: register_fonts(FONTS), max(repeat, 100))),
+    ])
+
+
+def bench_wrapping(repeat: int = 5):
+    """Étiquettes prix : coupure des textes du catalogue, avant (textwrap) / après (largeurs réelles)."""
+    import textwrap
+
+    from reportlab.lib.units import mm
+
+    from . import store
+    from .price_labels import DESC_MAX_LINES, FONTS, LABEL_WIDTH
+    from .text_layout import string_width, wrap_text
+
+    register_fonts(FONTS)
+    df = store.load_catalog(asset_path(store.DB_PATH), asset_path(CSV_PATH))
+    width = LABEL_WIDTH - 5 * mm
+    fields = [
+        ("Vendor", "IbarraRealNova-SemiBold", 11.5, 28, 2),
+        ("Title", "IbarraRealNova-Bold", 14, 30, 2),
+        ("custom.moyenne_description", "AdobeSansMM", 7.5, 61.5, DESC_MAX_LINES),
+    ]
+    texts = [(df[col].dropna().astype(str).tolist(), font, size, chars, max_lines) for col, font, size, chars, max_lines in fields]
+
+    def legacy():
+        # Ancien code : coupure au nombre de caractères puis mesure de chaque ligne
+        for values, font, size, chars, _ in texts:
+            for value in values:
+                for line in textwrap.wrap(value, width=chars):
+                    pdfmetrics.stringWidth(line, font, size)
+
+    def layout():
+        for values, font, size, _, max_lines in texts:
+            for value in values:
+                wrap_text(value, font, size, width, max_lines)
+
+    def clear():
+        wrap_text.cache_clear()
+        string_width.cache_clear()
+
+    def cold():
+        clear()
+        layout()
+
+    overflow_before = sum(
+        any(pdfmetrics.stringWidth(line, font, size) > width for line in textwrap.wrap(value, width=chars)[:max_lines])
+        for values, font, size, chars, max_lines in texts for value in values
+    )
+    cold_ms = _median_ms(cold, repeat)
+    clear()
+    layout()
+    overflow_after = sum(
+        any(string_width(line, font, size) > width for line in wrap_text(value, font, size, width, max_lines))
+        for values, font, size, _, max_lines in texts for value in values
+    )
+    n = sum(len(values) for values, *_ in texts)
+    _print_table(f"Coupure des lignes — {n} textes du catalogue (marque, titre, description)", [
+        ("avant : textwrap + stringWidth par ligne", _median_ms(legacy, repeat)),
+        ("après : largeurs réelles, cache vide", cold_ms),
+        ("après : largeurs réelles, cache chaud (rerun)", _median_ms(layout, repeat)),
+    ])
+    print(f"  textes qui débordent de l'étiquette : {overflow_before} avant, {overflow_after} après")
+
+
+def bench_preparation(repeat: int = 5):
+    """Préparation des lignes : tests cellule par cellule (iterrows) / colonnes vectorisées."""
+    import pandas as pd
+
+    from . import store
+    from .prepare import icon_records, prepare_price_rows
+
+    df = store.load_catalog(asset_path(store.DB_PATH), asset_path(CSV_PATH))
+
+    def filled(v):
+        return pd.notna(v) and str(v).strip() != '' and str(v).strip().lower() != 'nan'
+
+    def is_true(row, field, values=('true',)):
+        return str(row.get(field, '')).strip().lower() in values
+
+    def legacy():
+        # Ancienne boucle des onglets 2 à 4 : mêmes tests, refaits pour chaque ligne
+        for _, row in df.iterrows():
+            [str(row.get(f)).strip() for f in ('Vendor', 'Title', 'custom.taille', 'custom.moyenne_description',
+                                                'custom.routine') if filled(row.get(f))]
+            [is_true(row, f) for f in ('custom.info_vegan', 'custom.info_cruelty_free', 'custom.info_clean_beauty')]
+            [is_true(row, f, ('true', '1')) for f in ('custom.tout_type', 'custom.peau_acneique', 'custom.peau_grasse',
+                                                       'custom.peau_seche', 'custom.peau_sensible', 'custom.peau_mature')]
+            for field in ('Variant Price', 'Variant Compare Price'):
+                if filled(row.get(field)):
+                    try:
+                        f"{float(str(row.get(field)).replace(',', '.')):.2f}"
+                    except ValueError:
+                        pass
+            pao = row.get('custom.periode_mois', '')
+            if pd.notna(pao) and str(pao).strip() != '':
+                try:
+                    int(float(pao))
+                except ValueError:
+                    pass
+            str(row.get('custom.texte_recyclage', '')).strip().lower().replace(' ', '_')
+
+    def vectorized():
+        prepare_price_rows(df)
+        icon_records(df)
+
+    _print_table(f"Préparation des lignes — {len(df)} produits (prix, icônes, types de peau)", [
+        ("avant : iterrows + tests par cellule", _median_ms(legacy, repeat)),
+        ("après : colonnes pandas + enregistrements", _median_ms(vectorized, repeat)),
+    ])
+
+
+def bench_search(repeat: int = 5):
+    """Recherche de produits : filtre sur tous les libellés / index de trigrammes."""
+    from . import store
+    from .prepare import product_labels
+    from .search_index import ProductSearchIndex
+
+    df = store.load_catalog(asset_path(store.DB_PATH), asset_path(CSV_PATH))
+    barcode = df["Variant Barcode"].dropna().iloc[0]
+    queries = ["cosrx", "snail mucin", "anua pad", "crème", "50 ml", "beauty of joseon sun", str(barcode), "xyz"]
+
+    def legacy():
+        # Ancien fonctionnement : libellés recalculés à chaque rerun puis filtrés en entier
+        labels = product_labels(df).str.lower()
+        for query in queries:
+            labels[labels.str.contains(query.lower(), regex=False)].head(50).tolist()
+
+    build_ms = _median_ms(lambda: ProductSearchIndex(df), repeat)
+    index = ProductSearchIndex(df)
+    per_query = _median_ms(lambda: [index.search(q, 50) for q in queries], max(repeat, 50)) / len(queries)
+    _print_table(f"Recherche de produits — {len(df)} produits, {len(queries)} requêtes", [
+        ("avant : libellés + filtre sur toute la liste (par rerun)", _median_ms(legacy, repeat)),
+        ("après : construction de l'index (une fois par version)", build_ms),
+        ("après : une requête, 50 meilleurs résultats", per_query),
+    ])
+
+
+def _synthetic_qudo(n_lines: int, seed: int = 0, malformed: float = 0.01) -> str:
+    """Facture QUDO fictive : noms coupés, sauts de page avec en-têtes, échantillons, lignes cassées."""
+    import random
+
+    rng = random.Random(seed)
+    brands = ["Beauty of Joseon", "ANUA", "COSRX", "Round Lab", "Mixsoon", "Torriden", "Isntree", "SKIN1004"]
+    words = ["Relief", "Sun", "Rice", "Probiotics", "Heartleaf", "Pore", "Control", "Cleansing", "Oil",
+             "Snail", "Mucin", "Essence", "Birch", "Juice", "Cream", "Hyaluronic", "Toner", "Pad", "Serum"]
+    header = "No Barcode Description Unit Qty Unit Price Amount VAT"
+    lines = ["QUDO TRADING CO., LTD — Commercial invoice", "Seoul, Korea", header]
+    item = 0
+    while len(lines) < n_lines:
+        if len(lines) % 48 == 0:
+            lines += [f"Page {len(lines) // 48}", header]
+        item += 1
+        barcode = "MOSTRE" if rng.random() < 0.05 else str(8809000000000 + rng.randrange(10 ** 6))
+        name = f"{rng.choice(brands)} - {' '.join(rng.choices(words, k=rng.randint(2, 6)))} {rng.choice([30, 50, 100, 150])}ml"
+        qty, price = rng.randint(1, 48), rng.randint(100, 3000) / 100
+        tail = f"{rng.choice(['pcs', 'set', 'box'])} {qty} {price:.2f} {qty * price:.2f} 0.00"
+        if rng.random() < malformed:
+            lines.append(f"{item} ({barcode}) {name}")           # montants manquants
+        elif rng.random() < 0.15:
+            cut = name.rfind(" ", 0, len(name) // 2 + 1)
+            lines += [f"{item} ({barcode}) {name[:cut]}", f"{name[cut + 1:]} {tail}"]
+        else:
+            lines.append(f"{item} ({barcode}) {name} {tail}")
+    lines.append("Total")
+    return "\n".join(lines[:n_lines + 1])
+
+
+def _legacy_parse_qudo(text: str):
+    """Ancien analyseur : une seule expression DOTALL sur tout le texte."""
+    import re
+
+    s = re.sub(r"[ \t]+", " ", (text or "").replace("–", "-").replace("—", "-")).strip()
+    pat = re.compile(
+        r"\b\d+\s*\((?P<bc>\d{8,14}|MOSTRE)\)\s+(?P<name>.+?)\s+(?P<unit>pcs|set|box|ea)\s+(?P<qty>\d+)\s+"
+        r"(?P<unit_price>\d+[.,]?\d*)\s+(?P<value>\d+[.,]?\d*)\s+(?P<vat>\d+[.,]?\d*)",
+        re.IGNORECASE | re.DOTALL,
+    )
+    return [(m.group("bc"), m.group("name").strip(" -"), int(m.group("qty"))) for m in pat.finditer(s)]
+
+
+def bench_qudo(repeat: int = 5, n_lines: int = 10_000):
+    """Factures QUDO : expression DOTALL sur tout le texte / lecture ligne par ligne."""
+    from .orders import parse_qudo_lines
+
+    text = _synthetic_qudo(n_lines)
+    clean = _synthetic_qudo(n_lines, malformed=0)
+    # Pire cas : aucune unité reconnue, chaque article fait relire tout le reste du texte
+    n_unknown = 2_000
+    unknown = _synthetic_qudo(n_unknown)
+    for unit in (" pcs ", " set ", " box "):
+        unknown = unknown.replace(unit, " kit ")
+
+    def new(t):
+        return parse_qudo_lines(t.splitlines(), include_samples=True)
+
+    df, unparsed = new(text)
+    legacy_rows = _legacy_parse_qudo(text)
+    # Sans ligne cassée, les deux analyseurs doivent trouver les mêmes articles
+    clean_df, _ = new(clean)
+    same = [(bc, " ".join(name.split()), qty) for bc, name, qty in _legacy_parse_qudo(clean)] == list(
+        zip(clean_df["Barcode"], clean_df["Product Name"], clean_df["Qty"]))
+
+    _print_table(f"Facture QUDO — {n_lines} lignes, 1 % de lignes sans montants", [
+        ("avant : expression DOTALL (texte propre)", _median_ms(lambda: _legacy_parse_qudo(clean), repeat)),
+        ("avant : expression DOTALL (avec lignes cassées)", _median_ms(lambda: _legacy_parse_qudo(text), repeat)),
+        ("après : générateur ligne par ligne (texte propre)", _median_ms(lambda: new(clean), repeat)),
+        ("après : générateur ligne par ligne (avec lignes cassées)", _median_ms(lambda: new(text), repeat)),
+        (f"avant : unité inconnue, {n_unknown} lignes", _median_ms(lambda: _legacy_parse_qudo(unknown), 1)),
+        (f"après : unité inconnue, {n_unknown} lignes", _median_ms(lambda: new(unknown), repeat)),
+    ])
+    swallowed = sum("(" in name and ")" in name for _, name, _ in legacy_rows)
+    print(f"  articles lus : {len(legacy_rows)} avant (dont {swallowed} avalant l'article suivant), {len(df)} après ; "
+          f"{len(unparsed)} ligne(s) signalée(s) avec leur numéro")
+    print(f"  texte propre : mêmes articles avant / après : {'oui' if same else 'NON'}")
+
+
+def _legacy_price_rounding(raw_price: float, mode: str):
+    """Ancien ``price_rounding`` de l'onglet 8 (flottants, une valeur à la fois)."""
+    if mode in (".90 (vers le bas)", ".95 (vers le bas)"):
+        end = 0.90 if mode.startswith(".90") else 0.95
+        euros = math.floor(raw_price)
+        if raw_price - euros >= end:
+            return round(euros + end, 2)
+        return round((euros - 1) + end if euros > 0 else end, 2)
+    if mode == "0,10 le + proche":
+        return round(round(raw_price * 10) / 10.0, 2)
+    if mode == "arrondi sup. à 0,05":
+        return round(math.ceil(raw_price * 20) / 20.0, 2)
+    return round(raw_price, 2)
+
+
+def _decimal_price_rounding(raw_price: float, mode: str) -> float:
+    """Même règle que ``_legacy_price_rounding``, en décimal exact : la référence des écarts."""
+    cents = int((Decimal(str(raw_price)) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+    if mode in (".90 (vers le bas)", ".95 (vers le bas)"):
+        end = 90 if mode.startswith(".90") else 95
+        euros, rest = divmod(cents, 100)
+        cents = euros * 100 + end if rest >= end else ((euros - 1) * 100 + end if euros > 0 else end)
+    elif mode == "0,10 le + proche":
+        cents = int((Decimal(cents) / 10).quantize(Decimal(1), ROUND_HALF_EVEN)) * 10
+    elif mode == "arrondi sup. à 0,05":
+        cents = -(-cents // 5) * 5
+    return cents / 100
+
+
+def _decimal_scale(price: float, factor: float) -> float:
+    """``round(price * factor, 2)`` en décimal exact, demi-centime vers le haut."""
+    return float((Decimal(str(price)) * Decimal(str(factor))).quantize(Decimal("0.01"), ROUND_HALF_UP))
+
+
+def _decimal_sale(compare_price: float, discount: int) -> float:
+    """Prix barré moins ``discount`` %, multiple de 5 centimes supérieur, en décimal exact."""
+    cents = Decimal(str(compare_price)) * (100 - int(discount))
+    return float((cents / 5).to_integral_value(ROUND_CEILING) * 5 / 100)
+
+
+def _mismatches(failures: list, name: str, inputs, got, expected):
+    import numpy as np
+
+    got, expected = np.asarray(got, dtype=float), np.asarray(expected, dtype=float)
+    bad = np.flatnonzero(~np.isclose(got, expected, rtol=0, atol=1e-9, equal_nan=True))
+    if len(bad):
+        i = bad[0]
+        failures.append(f"{name} : {len(bad)} écart(s), ex. {inputs[i]} -> {got[i]} au lieu de {expected[i]}")
+
+
+def bench_pricing(repeat: int = 5, n_prices: int = 50_000):
+    """Prix de vente : ``.apply`` de l'ancienne fonction scalaire / centimes vectorisés (et vérification)."""
+    import numpy as np
+    import pandas as pd
+
+    from .pricing import ROUNDING_MODES, retail_prices, round_prices, sale_prices, scale_prices
+
+    rng = np.random.default_rng(0)
+    costs = pd.Series(np.round(rng.uniform(0.5, 60, n_prices), 2))
+    costs[rng.random(n_prices) < 0.01] = np.nan
+    multiplier, rate, mode = 2.8, 0.92, ROUNDING_MODES[0]
+
+    def legacy():
+        eur = costs.apply(lambda x: round(x * rate, 2) if pd.notna(x) else None)
+        brut = eur.apply(lambda x: round(x * multiplier, 2) if pd.notna(x) else None)
+        return brut.apply(lambda x: _legacy_price_rounding(x, mode) if pd.notna(x) else None)
+
+    _print_table(f"Prix de vente — {n_prices} coûts (conversion, multiplicateur, arrondi .90)", [
+        ("avant : trois .apply ligne par ligne", _median_ms(legacy, repeat)),
+        ("après : centimes vectorisés", _median_ms(lambda: retail_prices(scale_prices(costs, rate), multiplier, mode), repeat)),
+    ])
+
+    # Vérification : chaque mode, comparé à l'ancienne fonction (écarts d'arrondi flottant
+    # attendus, affichés) puis à sa version décimale exacte (aucun écart toléré)
+    failures = []
+    raw = np.concatenate([np.round(rng.uniform(0, 200, n_prices), 2), np.arange(0, 2001) / 100])
+    for mode in ROUNDING_MODES:
+        new = round_prices(raw, mode)
+        old = np.array([_legacy_price_rounding(float(x), mode) for x in raw])
+        exact = np.array([_decimal_price_rounding(float(x), mode) for x in raw])
+        diff = np.flatnonzero(~np.isclose(new, old, rtol=0, atol=1e-9))
+        _mismatches(failures, f"round_prices({mode!r})", raw, new, exact)
+        example = f" (ex. {raw[diff[0]]:.2f} : {old[diff[0]]:.2f} avant, {new[diff[0]]:.2f} après)" if len(diff) else ""
+        print(f"  {mode:<22} {len(raw) - len(diff)}/{len(raw)} identiques à l'ancienne fonction, "
+              f"{len(diff)} écart(s) d'arrondi flottant{example}")
+
+    compare = raw[raw > 0]
+    for discount in (10, 15, 20, 25, 30, 33, 50):
+        new = sale_prices(compare, discount)
+        old = np.array([round((x * (1 - discount / 100) * 20 + 0.9999) // 1 / 20, 2) for x in compare])
+        _mismatches(failures, f"sale_prices(-{discount} %) / ancien round_up_to_0_05", compare, new, old)
+        print(f"  soldes -{discount} % : {np.isclose(new, old, rtol=0, atol=1e-9).sum()}/{len(compare)} "
+              "identiques à l'ancien round_up_to_0_05")
+
+    # Tirages aléatoires : taux, multiplicateurs et remises quelconques contre le décimal exact
+    for _ in range(5):
+        prices = np.round(rng.uniform(0, 500, 2_000), 2)
+        factor = float(rng.choice([round(rng.uniform(0.5, 1.5), 4), round(rng.uniform(1, 4), 1)]))
+        _mismatches(failures, f"scale_prices(x {factor})", prices, scale_prices(prices, factor),
+                    [_decimal_scale(x, factor) for x in prices])
+        discounts = rng.integers(0, 91, len(prices))
+        _mismatches(failures, "sale_prices (remises par ligne)", prices, sale_prices(prices, discounts),
+                    [_decimal_sale(x, d) for x, d in zip(prices, discounts)])
+
+    # Valeurs manquantes et index conservés
+    series = pd.Series([np.nan, 12.34, None], index=[7, 8, 9], dtype=float)
+    for name, out in (("round_prices", round_prices(series, mode)), ("scale_prices", scale_prices(series, rate)),
+                      ("sale_prices", sale_prices(series, 30)), ("retail_prices", retail_prices(series, 2.5, mode)[1])):
+        if not (out.index.equals(series.index) and out.isna().tolist() == [True, False, True]):
+            failures.append(f"{name} : NaN ou index non conservés ({out.tolist()})")
+
+    if failures:
+        raise AssertionError("Prix : écarts avec la règle décimale exacte\n  " + "\n  ".join(failures))
+    print("  règle décimale exacte : OK (arrondis, conversions, remises aléatoires, NaN)")
+
+
+_SMALL_WORDS = {'de', 'du', 'des', 'la', 'le', 'les', 'et', 'ou', 'à', 'au', 'aux',
+                'the', 'of', 'for', 'and', 'in', 'on', 'with'}
+
+
+def _legacy_title(main: str) -> str:
+    words, out = main.split(), []
+    for i, w in enumerate(words):
+        if w.isupper() and len(w) <= 4:
+            out.append(w)
+        elif w.lower() in _SMALL_WORDS and i not in (0, len(words) - 1):
+            out.append(w.lower())
+        else:
+            out.append(w.capitalize())
+    return " ".join(out).strip()
+
+
+def _legacy_product_name(raw: str) -> dict:
+    """Ancien ``parse_product_name`` (StyleKorean), une ligne à la fois."""
+    s = str(raw or "").strip()
+    m_bc = re.search(r'(?i)bar\s*code\s*[:\-]?\s*([0-9]{8,14})', s)
+    m_vendor = re.search(r'^\s*\[([^\]]+)\]', s)
+    main = re.split(r'(?i)bar\s*code\s*[:\-]?', s)[0]
+    main = re.sub(r'^\s*(?:\[[^\]]+\]\s*)+', '', main).strip()
+    sizes = list(re.finditer(r'(\d+(?:[.,]\d+)?)\s*(ml|mL|ML|g|G|kg|KG|l|L|cl|CL|mg|MG|oz|OZ)\b', main))
+    size = ""
+    if sizes:
+        size = f"{sizes[-1].group(1).replace(',', '.')} {sizes[-1].group(2).lower()}"
+        start, end = sizes[-1].span()
+        main = (main[:start] + main[end:]).strip()
+    main = re.sub(r'\s{2,}', ' ', main).strip()
+    return {"Vendor": m_vendor.group(1).strip() if m_vendor else "", "Title": _legacy_title(main) if main else "",
+            "Size": size, "Barcode": m_bc.group(1) if m_bc else None}
+
+
+def _legacy_qudo_name(raw: str, default_vendor: str = "") -> dict:
+    """Ancien ``parse_qudo_name``, une ligne à la fois."""
+    s = str(raw or "").strip().replace("–", "-").replace("—", "-")
+    vendor, main = default_vendor, s
+    m_dash = re.match(r"^\s*([^-\[\]]{2,}?)\s*-\s*(.+)$", s)
+    if m_dash:
+        vendor, main = m_dash.group(1).strip(), m_dash.group(2).strip()
+    sizes = list(re.finditer(r"(\d+(?:[.,]\d+)?)\s*(ml|g|kg|l|cl|mg|oz)\b", main, flags=re.I))
+    size = ""
+    if sizes:
+        size = f"{sizes[-1].group(1).replace(',', '.')} {sizes[-1].group(2).lower()}"
+        start, end = sizes[-1].span()
+        if end == len(main) or re.match(r"\s*$", main[end:]):
+            main = main[:start].strip()
+    return {"Vendor": vendor, "Title": _legacy_title(main), "Size": size}
+
+
+def _legacy_usd(retail_raw):
+    if retail_raw != retail_raw or retail_raw is None:
+        return None
+    nums = []
+    for ln in [x.strip() for x in re.split(r'[\r\n]+', str(retail_raw)) if x.strip()]:
+        m = re.search(r'(\d[\d,]*\.?\d*)', ln)
+        if m:
+            nums.append(float(m.group(1).replace(",", "")))
+    return nums[1] if len(nums) >= 2 else (nums[0] if nums else None)
+
+
+def _legacy_weight(val):
+    if val != val or val is None:
+        return None
+    m = re.search(r"(\d+(?:[.,]\d+)?)\s*(kg|g|oz|lb)\b", str(val).strip(), flags=re.I)
+    if not m:
+        return None
+    factor = {"kg": 1000.0, "g": 1.0, "lb": 453.59237, "oz": 28.349523125}[m.group(2).lower()]
+    return float(m.group(1).replace(",", ".")) * factor
+
+
+def _synthetic_supplier(n_lines: int, seed: int = 0):
+    """Export StyleKorean fictif (Product Name, Retail Price, Weight) et noms QUDO correspondants."""
+    import random
+
+    import pandas as pd
+
+    rng = random.Random(seed)
+    brands = ["ANUA", "COSRX", "Beauty of Joseon", "SOME BY MI", "Round Lab", "I'm From", "Dr.Jart+"]
+    words = ["heartleaf", "SNAIL", "mucin", "of", "the", "AHA", "BHA", "pore", "deep", "cleansing", "foam",
+             "Relief", "sun", "SPF50+", "toner", "pad", "with", "and", "cream", "1025", "Dokdo", "2x"]
+    sizes = ["150ml", "50 mL", "1.5 oz", "30G", "200 ml", "1,5L", "10 x 20ml", "", "25g", "12.5 ml", "100 CL", "3 Kg"]
+    weights = ["208g", "0.2 kg", "7 oz", "1 lb", "150 G", "", "n/a", "2,5kg", None]
+    names, qudo, retail, weight = [], [], [], []
+    for _ in range(n_lines):
+        brand = rng.choice(brands)
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 7)))
+        size = rng.choice(sizes)
+        barcode = str(rng.randrange(10 ** 12, 10 ** 13))
+        tags = "".join(f"[{t}] " for t in rng.sample(["EU", "RENEW", "SET"], rng.randint(0, 2)))
+        names.append(f"[{brand.upper()}] {tags}{title} {size} BarCode: {barcode} ( Pieces per box : 40 ea )"
+                     if rng.random() > 0.01 else title)
+        qudo.append(f"{brand} - {title} {size}" if rng.random() > 0.2 else f"{title} {size} refill")
+        krw = rng.randint(5, 60) * 1000
+        retail.append(f"KRW {krw:,}\n{krw / 1400:.2f}\n{rng.randint(10, 60)}.00%" if rng.random() > 0.02 else f"{krw / 1400:.2f}")
+        weight.append(rng.choice(weights))
+    df = pd.DataFrame({"Product Name": names, "Retail Price": retail, "Weight": weight})
+    return df, pd.Series(qudo, name="Product Name")
+
+
+def bench_supplier(repeat: int = 3, n_lines: int = 50_000):
+    """Fichiers fournisseurs : ``.apply`` d'une expression par cellule / ``Series.str.extract`` par colonne."""
+    import pandas as pd
+
+    from .orders import parse_qudo_names, parse_stylekorean_names, retail_usd
+    from .units import weights_to_grams
+
+    df, qudo = _synthetic_supplier(n_lines)
+
+    def legacy():
+        return (pd.DataFrame(df["Product Name"].apply(_legacy_product_name).tolist()),
+                df["Retail Price"].apply(_legacy_usd), df["Weight"].apply(_legacy_weight),
+                qudo.apply(lambda x: _legacy_qudo_name(x, "QUDO")).apply(pd.Series))
+
+    def batch():
+        return (parse_stylekorean_names(df["Product Name"]), retail_usd(df["Retail Price"]),
+                weights_to_grams(df["Weight"]), parse_qudo_names(qudo, "QUDO"))
+
+    _print_table(f"Export fournisseur — {n_lines} lignes (noms StyleKorean, prix, poids, noms QUDO)", [
+        ("avant : .apply ligne par ligne", _median_ms(legacy, repeat)),
+        ("après : colonnes (str.extract)", _median_ms(batch, repeat)),
+    ])
+
+    old, new = legacy(), batch()
+    checks = [("StyleKorean", old[0], new[0], ["Vendor", "Title", "Size", "Barcode"]),
+              ("QUDO", old[3], new[3], ["Vendor", "Title", "Size"])]
+    for label, before, after, columns in checks:
+        for col in columns:
+            same = (before[col].fillna("").astype(str).to_numpy() == after[col].fillna("").astype(str).to_numpy()).sum()
+            print(f"  {label} {col:<8} {same}/{n_lines} identiques")
+    for label, before, after in (("Retail USD", old[1], new[1]), ("Poids (g)", old[2], new[2])):
+        same = pd.Series(before, dtype="float64").eq(after).sum() + (before.isna() & after.isna()).sum()
+        print(f"  {label:<20} {same}/{n_lines} identiques")
+
+
+def _synthetic_variants(n_variants: int, seed: int = 0):
+    """Table ``variants`` fictive : ~60 % de produits tagués soldesNN, prix barrés posés ou non."""
+    import random
+
+    rng = random.Random(seed)
+    rows, product_id = [], 0
+    while len(rows) < n_variants:
+        product_id += 1
+        tags = rng.choice(["", "nouveau", "soldes30", "soldes20, promo", "best, Soldes50"])
+        for k in range(rng.randint(1, 4)):
+            price = round(rng.uniform(5, 80), 2)
+            compare = rng.choice([None, f"{price * 1.4:.2f}", f"{price:.2f}"])
+            rows.append({"variant_id": product_id * 10 + k, "product_id": product_id, "barcode": "",
+                         "inventory_item_id": None, "title": f"Produit {product_id}", "variant_title": "",
+                         "price": f"{price:.2f}", "compare_at_price": compare, "tags": tags})
+    return rows[:n_variants]
+
+
+def bench_sales(repeat: int = 5, n_variants: int = 1_000):
+    """Soldes : test variante par variante / plan vectorisé depuis la base locale (et en cache)."""
+    import os
+    import tempfile
+
+    import pandas as pd
+
+    from . import store
+    from .sales import SALE, get_plan, record_pushed
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "soldes.sqlite")
+        store.apply_variant_changes(_synthetic_variants(n_variants), replace_all=True, db_path=db_path)
+        variants = store.load_variants(db_path)
+
+        def legacy():
+            # Ancien apply_discount, sans les appels API (relecture du catalogue, PUT par variante)
+            pending = 0
+            for row in variants.itertuples(index=False):
+                tag = next((t.strip().lower() for t in str(row.tags or "").split(",")
+                            if t.strip().lower().startswith("soldes")), None)
+                if not tag or not tag[6:].isdigit():
+                    continue
+                current = float(row.price)
+                compare_at = None if pd.isna(row.compare_at_price) else row.compare_at_price
+                compare = float(compare_at) if compare_at else current
+                target = round((compare * (1 - int(tag[6:]) / 100) * 20 + 0.9999) // 1 / 20, 2)
+                pending += compare_at is None or abs(compare - current) < 0.01 or abs(current - target) > 0.01
+            return pending
+
+        def cold():
+            store.invalidate(db_path)
+            from . import sales
+            sales._plans.clear()
+            return get_plan(SALE, db_path=db_path)
+
+        plan = cold()
+        _print_table(f"Soldes — aperçu de {n_variants} variantes ({len(plan.table)} taguées)", [
+            ("avant : boucle par variante (hors appels API)", _median_ms(legacy, repeat)),
+            ("après : lecture SQLite + plan vectorisé", _median_ms(cold, repeat)),
+            ("après : plan en cache (rerun)", _median_ms(lambda: get_plan(SALE, db_path=db_path), max(repeat, 50))),
+        ])
+        print(f"  à envoyer : {len(plan.pending)} avant ({legacy()} selon l'ancien test)", end="")
+        # Application simulée : tout passe, la base locale est mise à jour
+        record_pushed(plan.variants, plan.table.assign(applied=plan.table["changed"], error=""), db_path=db_path)
+        print(f", {len(get_plan(SALE, db_path=db_path).pending)} après application")
+
+
+BULK_FIXTURE = asset_path("etiquettes", "fixtures", "bulk_products.jsonl")
+
+# Produits attendus du fichier BULK_FIXTURE : variantes remises dans l'ordre ``position``,
+# variante 1013 rattachée à 101 bien qu'écrite après le produit 102, enfants orphelins
+# (produit 99, absent de l'export) ignorés, produit sans enfant conservé
+BULK_EXPECTED = [
+    {"id": 101, "title": "Crème Hydratante", "vendor": "COSRX", "product_type": "Soin", "status": "active",
+     "tags": "nouveau, soldes30", "updated_at": "2026-10-01T08:00:00Z",
+     "variants": [
+         {"id": 1011, "title": "50 ml", "barcode": "8809598451117", "price": "14.90", "compare_at_price": None,
+          "position": 1, "inventory_item_id": 5011},
+         {"id": 1012, "title": "100 ml", "barcode": "8809598451124", "price": "24.90", "compare_at_price": "29.90",
+          "position": 2, "inventory_item_id": 5012},
+         {"id": 1013, "title": "200 ml", "barcode": "8809598451131", "price": "39.90", "compare_at_price": None,
+          "position": 3, "inventory_item_id": 5013},
+     ],
+     "metafields": [{"namespace": "custom", "key": "taille", "value": "50 ml"},
+                    {"namespace": "custom", "key": "ingredients", "value": "Eau, glycérine"}]},
+    {"id": 102, "title": "Sérum Vitamine C", "vendor": "Klairs", "product_type": "Soin", "status": "draft",
+     "tags": "", "updated_at": "2026-10-02T09:30:00Z",
+     "variants": [{"id": 1021, "title": "Default Title", "barcode": None, "price": "19.50", "compare_at_price": None,
+                   "position": 1, "inventory_item_id": 5021}],
+     "metafields": []},
+    {"id": 103, "title": "Patchs Yeux", "vendor": "Heimish", "product_type": "Masque", "status": "archived",
+     "tags": "best", "updated_at": "2026-10-03T10:00:00Z", "variants": [], "metafields": []},
+]
+
+
+class _FakeShopify:
+    """
+    Faux Shopify local (``http://127.0.0.1:<port>``) : accepte l'export Bulk, le déclare
+    terminé au deuxième sondage et sert ``jsonl_path`` comme fichier de résultat.
+    """
+
+    def __init__(self, jsonl_path: str):
+        import http.server
+        import json
+        import threading
+
+        fake = self
+        self.requests = []
+        self.polls = 0
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _reply(self, body: bytes, content_type: str = "application/json"):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+                fake.requests.append(query)
+                if "bulkOperationRunQuery" in query:
+                    fake.polls = 0
+                    data = {"bulkOperationRunQuery": {
+                        "bulkOperation": {"id": "gid://shopify/BulkOperation/1", "status": "CREATED"}, "userErrors": []}}
+                else:
+                    fake.polls += 1
+                    done = fake.polls >= 2
+                    data = {"node": {"id": "gid://shopify/BulkOperation/1", "status": "COMPLETED" if done else "RUNNING",
+                                     "url": f"{fake.url}/export.jsonl" if done else None}}
+                self._reply(json.dumps({"data": data}).encode())
+
+            def do_GET(self):
+                with open(jsonl_path, "rb") as f:
+                    self._reply(f.read(), "application/jsonl")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def bench_bulk(repeat: int = 5):
+    """Export Bulk contre un faux Shopify local servant ``BULK_FIXTURE`` : reconstitution vérifiée."""
+    import json
+
+    from .bulk_sync import iter_bulk_products, sync_products_bulk
+    from .shopify_client import ShopifyClient
+
+    with open(BULK_FIXTURE, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    parsed = list(iter_bulk_products(records))
+
+    fake = _FakeShopify(BULK_FIXTURE)
+    try:
+        client = ShopifyClient(fake.url, "jeton-de-test")
+        synced = sync_products_bulk(client, poll_interval=0)
+        _print_table(f"Export Bulk — faux Shopify local ({len(records)} lignes JSONL)", [
+            ("soumission + sondages + lecture en flux", _median_ms(lambda: sync_products_bulk(client, poll_interval=0),
+                                                                   repeat)),
+            ("reconstitution seule (lignes déjà lues)", _median_ms(lambda: list(iter_bulk_products(records)), repeat)),
+        ])
+    finally:
+        fake.close()
+
+    failures = []
+    for name, products in (("iter_bulk_products", parsed), ("sync_products_bulk", synced)):
+        if products != BULK_EXPECTED:
+            got = [(p["id"], [v["id"] for v in p["variants"]], [m["key"] for m in p["metafields"]]) for p in products]
+            failures.append(f"{name} : {got}")
+    if failures:
+        raise AssertionError("Export Bulk : produits reconstitués inattendus\n  " + "\n  ".join(failures))
+    print(f"  {len(synced)} produits, {sum(len(p['variants']) for p in synced)} variantes, "
+          f"{sum(len(p['metafields']) for p in synced)} metafields ; orphelins ignorés : OK")
+
+
+BENCHES = {
+    "bulk": bench_bulk,
+    "polices": bench_fonts,
+    "fournisseurs": bench_supplier,
+    "habillage": bench_wrapping,
+    "preparation": bench_preparation,
+    "prix": bench_pricing,
+    "qudo": bench_qudo,
+    "recherche": bench_search,
+    "soldes": bench_sales,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m etiquettes.bench", description="Mesures de performance.")
+    parser.add_argument("mesure", choices=sorted(BENCHES) + ["tout"])
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="répétitions (médiane)")
+    args = parser.parse_args(argv)
+    for name in (sorted(BENCHES) if args.mesure == "tout" else [args.mesure]):
+        try:
+            BENCHES[name](repeat=args.repeat)
+        except AssertionError as e:
+            # Une mesure qui vérifie aussi l'équivalence échoue au moindre écart
+            print(f"\nÉCHEC ({name}) : {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
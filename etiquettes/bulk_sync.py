@@ -0,0 +1,202 @@
+"""
+Synchronisation de la base produits via une Bulk Operation GraphQL Shopify.
+
+Une seule requête ``bulkOperationRunQuery`` exporte produits, variantes et
+metafields ``custom.*`` ; le fichier JSONL produit par Shopify est lu en flux
+et reconstitué au format des produits REST (voir ``catalog.product_to_row``).
+"""
+import json
+import time
+
+import requests
+
+from .catalog import METAFIELD_NAMESPACE
+from .shopify_client import ShopifyError, gid_to_id
+
+BULK_PRODUCTS_QUERY = """
+{
+  products%(filter)s {
+    edges {
+      node {
+        id
+        title
+        vendor
+        productType
+        status
+        tags
+        updatedAt
+        variants {
+          edges {
+            node {
+              id
+              title
+              barcode
+              price
+              compareAtPrice
+              position
+              inventoryItem { id }
+            }
+          }
+        }
+        metafields(namespace: "%(namespace)s") {
+          edges {
+            node { id namespace key value }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+RUN_MUTATION = """
+mutation bulkRun($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+POLL_QUERY = """
+query bulkStatus($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation { id status errorCode objectCount url partialDataUrl }
+  }
+}
+"""
+
+FINAL_STATUSES = {"COMPLETED", "FAILED", "CANCELED", "EXPIRED"}
+
+# Type d'enfant JSONL -> liste du produit REST
+CHILD_LISTS = {"ProductVariant": "variants", "Metafield": "metafields"}
+
+
+def build_products_query(updated_at_min=None, status: str = "active") -> str:
+    """Requête d'export ; ``updated_at_min`` (datetime ou ISO) limite aux produits modifiés."""
+    filters = []
+    if status:
+        filters.append(f"status:{status}")
+    if updated_at_min is not None:
+        iso = updated_at_min.isoformat() if hasattr(updated_at_min, "isoformat") else str(updated_at_min)
+        filters.append(f"updated_at:>='{iso}'")
+    query_filter = f'(query: "{" AND ".join(filters)}")' if filters else ""
+    return BULK_PRODUCTS_QUERY % {"filter": query_filter, "namespace": METAFIELD_NAMESPACE}
+
+
+def run_bulk_query(client, query: str, poll_interval: float = 2.0, timeout: float = 1800, on_status=None) -> dict:
+    """
+    Soumet l'export puis attend sa fin.
+    Renvoie l'opération finale (``url`` vaut None si l'export est vide).
+    """
+    data = client.graphql(RUN_MUTATION, {"query": query})
+    result = data.get("bulkOperationRunQuery") or {}
+    errors = result.get("userErrors") or []
+    if errors:
+        raise ShopifyError("; ".join(e.get("message", "") for e in errors))
+    operation = result.get("bulkOperation") or {}
+    op_id = operation.get("id")
+    if not op_id:
+        raise ShopifyError("Shopify n'a pas renvoyé d'identifiant d'export.")
+
+    deadline = time.monotonic() + timeout
+    while True:
+        operation = client.graphql(POLL_QUERY, {"id": op_id}).get("node") or {}
+        if on_status:
+            on_status(operation)
+        status = operation.get("status")
+        if status in FINAL_STATUSES:
+            break
+        if time.monotonic() > deadline:
+            raise ShopifyError(f"Export Shopify toujours en cours après {timeout:.0f}s ({status}).")
+        time.sleep(poll_interval)
+
+    if operation.get("status") != "COMPLETED":
+        raise ShopifyError(f"Export Shopify {operation.get('status')} ({operation.get('errorCode')}).")
+    return operation
+
+
+def iter_jsonl(url: str, session=None):
+    """Lit le JSONL de l'export ligne par ligne, sans le charger en mémoire."""
+    http = session or requests
+    with http.get(url, stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+
+def _gid_type(gid: str) -> str:
+    # 'gid://shopify/ProductVariant/1' -> 'ProductVariant'
+    return str(gid).split("/")[-2] if gid else ""
+
+
+def _to_rest_product(node: dict) -> dict:
+    return {
+        "id": gid_to_id(node.get("id")),
+        "title": node.get("title"),
+        "vendor": node.get("vendor"),
+        "product_type": node.get("productType"),
+        "status": str(node.get("status") or "").lower(),
+        "tags": ", ".join(node.get("tags") or []),
+        "updated_at": node.get("updatedAt"),
+        "variants": [],
+        "metafields": [],
+    }
+
+
+def _finish(product: dict) -> dict:
+    product["variants"].sort(key=lambda v: v.get("position") or 0)
+    return product
+
+
+def _child(record: dict, kind: str) -> dict:
+    if kind == "ProductVariant":
+        return {
+            "id": gid_to_id(record.get("id")),
+            "title": record.get("title"),
+            "barcode": record.get("barcode"),
+            "price": record.get("price"),
+            "compare_at_price": record.get("compareAtPrice"),
+            "position": record.get("position"),
+            "inventory_item_id": gid_to_id((record.get("inventoryItem") or {}).get("id")),
+        }
+    return {"namespace": record.get("namespace"), "key": record.get("key"), "value": record.get("value")}
+
+
+def iter_bulk_products(records):
+    """
+    Regroupe les lignes JSONL (produits et enfants ``__parentId``) en produits au
+    format REST, avec ``variants`` et ``metafields``, dans l'ordre de l'export.
+    Shopify garantit seulement qu'un parent précède ses enfants, pas que ceux-ci le
+    suivent immédiatement : les enfants sont rangés par ID de produit et les produits
+    ne sortent qu'une fois le fichier entièrement lu. Seuls les enfants dont le
+    produit n'apparaît nulle part dans le fichier sont ignorés.
+    """
+    products = {}
+    children = {}
+    for record in records:
+        parent = record.get("__parentId")
+        if parent is None:
+            product = _to_rest_product(record)
+            products[product["id"]] = product
+            continue
+        kind = _gid_type(record.get("id"))
+        if kind in CHILD_LISTS:
+            children.setdefault(gid_to_id(parent), []).append((CHILD_LISTS[kind], _child(record, kind)))
+    for product_id, product in products.items():
+        for field, child in children.get(product_id, ()):
+            product[field].append(child)
+        yield _finish(product)
+
+
+def sync_products_bulk(client, updated_at_min=None, status: str = "active", poll_interval: float = 2.0, on_status=None):
+    """
+    Exporte les produits modifiés depuis ``updated_at_min`` et les renvoie en liste.
+    ``status=None`` inclut aussi archivés et brouillons (synchro incrémentale).
+    """
+    query = build_products_query(updated_at_min, status=status)
+    operation = run_bulk_query(client, query, poll_interval=poll_interval, on_status=on_status)
+    if not operation.get("url"):
+        return []
+    return list(iter_bulk_products(iter_jsonl(operation["url"])))
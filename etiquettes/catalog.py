@@ -0,0 +1,86 @@
+"""Schéma de la base produits et conversion des produits Shopify en lignes."""
+
+CSV_PATH = "data/produits_shopify.csv"
+
+METAFIELD_NAMESPACE = "custom"
+METAFIELD_KEYS = [
+    "mini_description", "moyenne_description", "utilisation", "taille", "ingredients", "routine",
+    "info_bestseller", "info_cruelty_free", "info_vegan", "info_clean_beauty",
+    "tout_type", "peau_grasse", "peau_mature", "peau_seche", "peau_sensible", "peau_acneique",
+    "periode_mois", "texte_recyclage",
+]
+
+BASE_COLUMNS = [
+    "ID", "updated_at", "Vendor", "Title", "Type",
+    "Variant Price", "Variant Compare Price", "Variant Barcode",
+]
+CSV_COLUMNS = BASE_COLUMNS + [f"custom.{key}" for key in METAFIELD_KEYS]
+
+
+def metafields_to_data(metafields) -> dict:
+    """Extrait les valeurs ``custom.*`` connues (chaîne vide si absente)."""
+    data = {key: "" for key in METAFIELD_KEYS}
+    for meta in metafields or []:
+        key = meta.get("key")
+        if meta.get("namespace") == METAFIELD_NAMESPACE and key in data:
+            value = meta.get("value")
+            if value is not None and value != "":
+                data[key] = str(value)
+    return data
+
+
+def product_to_row(p: dict, metafield_data: dict = None) -> dict:
+    """
+    Convertit un produit au format REST (id, vendor, variants...) en ligne du CSV.
+    Les metafields sont lus dans ``p["metafields"]`` si ``metafield_data`` n'est pas fourni.
+    """
+    if metafield_data is None:
+        metafield_data = metafields_to_data(p.get("metafields"))
+    first_variant = (p.get("variants") or [{}])[0]
+    return {
+        "ID": p.get("id"),
+        "updated_at": p.get("updated_at"),
+        "Vendor": p.get("vendor"),
+        "Title": p.get("title"),
+        "Type": p.get("product_type"),
+        "Variant Price": first_variant.get("price"),
+        "Variant Compare Price": first_variant.get("compare_at_price"),
+        "Variant Barcode": first_variant.get("barcode"),
+        **{f"custom.{key}": metafield_data.get(key, "") for key in METAFIELD_KEYS},
+    }
+
+
+VARIANT_COLUMNS = [
+    "variant_id", "product_id", "barcode", "inventory_item_id",
+    "title", "variant_title", "price", "compare_at_price", "tags",
+]
+
+
+def normalize_barcode(value) -> str:
+    """'8809738316993.0' / ' 8809738316993 ' -> '8809738316993' ; '' si vide."""
+    if value is None:
+        return ""
+    s = str(value).strip()
+    if s.lower() in ("", "nan", "none"):
+        return ""
+    if s.endswith(".0") and s[:-2].isdigit():
+        s = s[:-2]
+    return s
+
+
+def variant_rows(p: dict) -> list:
+    """Une ligne par variante (table ``variants`` de la base locale)."""
+    return [
+        {
+            "variant_id": v.get("id"),
+            "product_id": p.get("id"),
+            "barcode": normalize_barcode(v.get("barcode")),
+            "inventory_item_id": v.get("inventory_item_id"),
+            "title": p.get("title"),
+            "variant_title": v.get("title"),
+            "price": v.get("price"),
+            "compare_at_price": v.get("compare_at_price"),
+            "tags": p.get("tags") or "",
+        }
+        for v in p.get("variants") or []
+    ]
@@ -0,0 +1,136 @@
+"""
+Génération d'étiquettes en ligne de commande, sans Streamlit (cron, workers).
+
+    python -m etiquettes prix --commande bon.csv -o etiquettes.pdf
+    python -m etiquettes traduction --marque "Beauty of Joseon" -o traductions/
+    python -m etiquettes docx --barcodes 8809738316993,8809782554624 -o fiches.docx
+
+Les produits viennent de la base locale (SQLite, importée du CSV au besoin).
+Les moteurs de rendu ne sont importés que pour la commande demandée.
+"""
+import argparse
+import os
+import re
+import sys
+
+from . import store
+from .assets import asset_path
+from .catalog import CSV_PATH, normalize_barcode
+from .render_cache import get_render_cache
+
+DEFAULT_OUTPUTS = {
+    "prix": "etiquettes_shopify.pdf",
+    "traduction": "etiquettes_traduction.pdf",
+    "docx": "Etiquettes_Produits_YOOMI.docx",
+}
+
+
+def _split_values(values) -> list:
+    # --barcodes a,b --barcodes c -> ['a', 'b', 'c']
+    return [v.strip() for value in values or [] for v in value.split(",") if v.strip()]
+
+
+def select_products(df, barcodes=(), vendors=(), order_path=None, all_products=False):
+    """
+    Produits de la base correspondant à la sélection (union des critères).
+    Renvoie (DataFrame, barcodes demandés mais absents de la base).
+    """
+    if all_products:
+        return df, []
+    wanted = {normalize_barcode(b) for b in barcodes}
+    if order_path:
+        from .orders import order_barcodes
+        wanted.update(normalize_barcode(b) for b in order_barcodes(order_path))
+    wanted.discard("")
+
+    df_barcodes = df["Variant Barcode"].apply(normalize_barcode)
+    mask = df_barcodes.isin(wanted)
+    if vendors:
+        mask |= df["Vendor"].astype(object).fillna("").astype(str).str.strip().str.lower().isin({v.lower() for v in vendors})
+    missing = sorted(wanted - set(df_barcodes))
+    return df[mask], missing
+
+
+def _file_name(label: str) -> str:
+    return re.sub(r'[\\/:*?"<>|]', "_", label.replace(" ", "_")) + ".pdf"
+
+
+def write_price_labels(df, output, workers=None):
+    from .price_labels import render_price_labels_parallel
+    with open(output, "wb") as f:
+        f.write(render_price_labels_parallel(df.sort_values("ID", ascending=False), workers=workers))
+    return [output]
+
+
+def write_translation_labels(df, output, workers=None):
+    """Un seul PDF multi-pages si ``output`` finit par .pdf, sinon un PDF par produit dans ce dossier."""
+    if output.lower().endswith(".pdf"):
+        from .translation_labels import render_translation_labels_cached
+        with open(output, "wb") as f:
+            f.write(render_translation_labels_cached(df))
+        return [output]
+
+    from .translation_labels import label_name, render_translation_label
+    os.makedirs(output, exist_ok=True)
+    paths = []
+    for row in df.to_dict("records"):
+        path = os.path.join(output, _file_name(label_name(row)))
+        with open(path, "wb") as f:
+            f.write(render_translation_label(row))
+        paths.append(path)
+    return paths
+
+
+def write_docx(df, output, workers=None):
+    from .docx_labels import build_doc_from_df_cached
+    with open(output, "wb") as f:
+        f.write(build_doc_from_df_cached(df).getvalue())
+    return [output]
+
+
+WRITERS = {
+    "prix": write_price_labels,
+    "traduction": write_translation_labels,
+    "docx": write_docx,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m etiquettes", description="Génère les étiquettes YOOMI sans interface.")
+    parser.add_argument("type", choices=sorted(WRITERS), help="prix (PDF 8/page), traduction (PDF 5×5 par produit), docx (fiches Word)")
+    parser.add_argument("-o", "--output", help="fichier de sortie ; pour traduction, un dossier = un PDF par produit")
+    parser.add_argument("--processus", type=int, help="processus de rendu des étiquettes prix (défaut : nb de CPU)")
+    parser.add_argument("--db", default=asset_path(store.DB_PATH), help="base produits SQLite")
+    parser.add_argument("--csv", default=asset_path(CSV_PATH), help="CSV importé si la base n'existe pas encore")
+    selection = parser.add_argument_group("sélection (cumulable)")
+    selection.add_argument("--barcodes", action="append", help="barcodes séparés par des virgules")
+    selection.add_argument("--marque", action="append", help="marque (Vendor), répétable")
+    selection.add_argument("--commande", help="bon fournisseur : CSV StyleKorean ou TXT QUDO")
+    selection.add_argument("--tous", action="store_true", help="toute la base")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    barcodes, vendors = _split_values(args.barcodes), _split_values(args.marque)
+    if not (barcodes or vendors or args.commande or args.tous):
+        print("Aucune sélection : utiliser --barcodes, --marque, --commande ou --tous.", file=sys.stderr)
+        return 2
+
+    df = store.load_catalog(args.db, args.csv)
+    if df.empty:
+        print(f"Base produits vide ou introuvable : {args.db}", file=sys.stderr)
+        return 1
+    selected, missing = select_products(df, barcodes, vendors, args.commande, args.tous)
+    for barcode in missing:
+        print(f"Barcode absent de la base : {barcode}", file=sys.stderr)
+    if selected.empty:
+        print("Aucun produit sélectionné.", file=sys.stderr)
+        return 1
+
+    paths = WRITERS[args.type](selected, args.output or DEFAULT_OUTPUTS[args.type], workers=args.processus)
+    print(f"{len(selected)} produit(s) -> {len(paths)} fichier(s) : {', '.join(paths[:3])}{' ...' if len(paths) > 3 else ''}")
+    stats = get_render_cache().stats()
+    if stats["hits"] or stats["misses"]:
+        print(get_render_cache().summary())
+    return 0
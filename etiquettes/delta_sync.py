@@ -0,0 +1,60 @@
+"""
+Synchronisation incrémentale : produits modifiés depuis le dernier point de reprise
+(watermark), produits archivés/brouillons et produits supprimés (tombstones).
+
+Les suppressions n'apparaissent pas dans ``updated_at_min`` : elles sont déduites
+d'une liste légère des IDs actifs (``products.json?fields=id``, ~5 appels pour
+1 200 produits) comparée aux IDs de la base locale.
+"""
+import pandas as pd
+
+
+def split_tombstones(products):
+    """Sépare les produits actifs des autres (archivés, brouillons) à retirer de la base."""
+    active, tombstones = [], []
+    for p in products:
+        if str(p.get("status") or "").lower() == "active":
+            active.append(p)
+        else:
+            tombstones.append(p.get("id"))
+    return active, tombstones
+
+
+def changed_since(products, since=None) -> list:
+    """
+    Produits modifiés strictement après ``since``. Les filtres Shopify (``updated_at_min``,
+    ``updated_at:>=``) incluent la borne : sans ce tri, le dernier produit synchronisé,
+    dont la date *est* le point de reprise, reviendrait à chaque synchro.
+    """
+    if since is None:
+        return list(products)
+    products = list(products)
+    since = pd.Timestamp(since)
+    since = since.tz_localize("UTC") if since.tzinfo is None else since
+    dates = pd.to_datetime([p.get("updated_at") for p in products], errors="coerce", utc=True)
+    return [p for p, date in zip(products, dates) if pd.isna(date) or date > since]
+
+
+def max_updated_at(products, default=None):
+    """Nouveau point de reprise : le plus grand ``updated_at`` vu chez Shopify."""
+    dates = pd.to_datetime([p.get("updated_at") for p in products], errors="coerce", utc=True)
+    dates = dates[dates.notna()]
+    if len(dates) == 0:
+        return default
+    latest = dates.max()
+    return latest if default is None or latest > default else default
+
+
+def fetch_active_ids(client) -> set:
+    """IDs de tous les produits actifs, sans autre champ."""
+    ids = set()
+    for page in client.paginate("products.json", {"fields": "id", "status": "active", "limit": 250}):
+        ids.update(int(p["id"]) for p in page.get("products", []))
+    return ids
+
+
+def find_deleted_ids(client, local_ids) -> set:
+    """IDs présents en local mais plus actifs chez Shopify (supprimés ou archivés)."""
+    if not local_ids:
+        return set()
+    return set(local_ids) - fetch_active_ids(client)
@@ -0,0 +1,188 @@
+"""Fiches Word de traduction fournisseur (onglet « Étiquettes de traduction Fournisseur »)."""
+import os
+import re
+from html.parser import HTMLParser
+from io import BytesIO
+
+import pandas as pd
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Inches
+
+from .assets import asset_path
+from .prepare import icon_records
+from .render_cache import get_render_cache, row_keys
+
+PRECAUTION_DEFAULT = (
+    "<b>Avertissement!</b> Usage externe uniquement. Éviter tout contact avec les yeux. "
+    "Tenir hors de portée des enfants. En cas d'apparition de rougeurs, de gonflements ou de démangeaisons pendant ou après l'utilisation, consultez un médecin. "
+    "<br><b>A consommer de préférence avant le / Numéro de lot :</b> indiqué sur l'emballage."
+)
+
+# Champs lus par _add_product_table ; changer la mise en page = changer LAYOUT_VERSION
+LAYOUT_FIELDS = [
+    "Vendor", "Title", "custom.taille", "Variant Barcode", "custom.utilisation",
+    "custom.ingredients", "custom.periode_mois", "custom.texte_recyclage",
+]
+LAYOUT_VERSION = "docx-fournisseur/1"
+
+_ICON_REF = re.compile(r'r:embed="@icone:([^@"]+)@"')
+
+INFO_BLOCK_TEMPLATE = (
+    "<b>Fabricant :</b> {vendor}<br>"
+    "<b>EU RP :</b>  Yoomi k-beauty, 19 rue merciere, 68100 Mulhouse, France - 03 65 67 40 62 - SIREN 932 945 256<br>"
+    "<b>Fabriqué en Corée</b>"
+)
+
+
+class DocxHTMLParser(HTMLParser):
+    def __init__(self, paragraph):
+        super().__init__()
+        self.paragraph = paragraph
+        self.bold = False
+        self.italic = False
+        self.underline = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'b':
+            self.bold = True
+        elif tag == 'i':
+            self.italic = True
+        elif tag == 'u':
+            self.underline = True
+
+    def handle_endtag(self, tag):
+        if tag == 'b':
+            self.bold = False
+        elif tag == 'i':
+            self.italic = False
+        elif tag == 'u':
+            self.underline = False
+
+    def handle_data(self, data):
+        run = self.paragraph.add_run(data)
+        run.bold = self.bold
+        run.italic = self.italic
+        run.underline = self.underline
+
+
+def _feed_html(p, html_text):
+    parser = DocxHTMLParser(p)
+    parser.feed(str(html_text).replace("<br>", "\n"))
+
+
+def _add_product_table(doc, row):
+    """
+    Ajoute le tableau d'un produit (``row`` : ligne de ``icon_records``) ;
+    renvoie (élément w:tbl, icônes insérées).
+    """
+    table = doc.add_table(rows=1, cols=1)
+    cell = table.cell(0, 0)
+
+    # Titre
+    _feed_html(cell.add_paragraph(), f"<b>{row.get('Vendor', '')}</b>\n<b>{row.get('Title', '')}</b>")
+
+    # Contenance
+    cont = row.get('custom.taille', '')
+    if pd.notna(cont) and str(cont).strip():
+        _feed_html(cell.add_paragraph(), f"<b>Contenance :</b> {str(cont).strip()}")
+
+    # Barcode
+    barcode = str(row.get('Variant Barcode', ''))
+    _feed_html(cell.add_paragraph(), f"<b>Barcode :</b> {barcode}")
+
+    # Utilisation
+    util = str(row.get('custom.utilisation', ''))
+    if util and util.lower() != 'nan':
+        _feed_html(cell.add_paragraph(), f"<b>Mode d'emploi :</b> {util}")
+
+    # Ingrédients
+    ing = str(row.get('custom.ingredients', ''))
+    _feed_html(cell.add_paragraph(), f"<b>Ingrédients :</b> {ing}")
+
+    # Précaution
+    _feed_html(cell.add_paragraph(), PRECAUTION_DEFAULT)
+
+    # Infos fabricant
+    vendor = str(row.get('Vendor', ''))
+    _feed_html(cell.add_paragraph(), INFO_BLOCK_TEMPLATE.format(vendor=vendor))
+
+    # Icônes
+    p = cell.add_paragraph()
+    run = p.add_run()
+
+    icons = []
+    for icon, width in ((row["_pao_icon"], Inches(0.6)), (row["_tri_icon"], Inches(2))):
+        if os.path.exists(asset_path("icones", icon)):
+            run.add_picture(asset_path("icones", icon), width=width)
+            icons.append(icon)
+
+    # Bordures
+    cell._element.get_or_add_tcPr().append(parse_xml(r'<w:tcBorders %s>'
+        r'<w:top w:val="single" w:sz="6" w:space="0" w:color="000000"/>'
+        r'<w:left w:val="single" w:sz="6" w:space="0" w:color="000000"/>'
+        r'<w:bottom w:val="single" w:sz="6" w:space="0" w:color="000000"/>'
+        r'<w:right w:val="single" w:sz="6" w:space="0" w:color="000000"/>'
+        r'</w:tcBorders>' % nsdecls('w')))
+
+    return table._tbl, icons
+
+
+def _save(doc) -> BytesIO:
+    buf = BytesIO()
+    doc.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def build_doc_from_df(df_src: pd.DataFrame) -> BytesIO:
+    """Un tableau encadré par produit : titre, contenance, barcode, mode d'emploi, ingrédients, icônes."""
+    doc = Document()
+    doc.add_paragraph()
+    for row in icon_records(df_src):
+        _add_product_table(doc, row)
+        doc.add_paragraph()
+    return _save(doc)
+
+
+def build_doc_from_df_cached(df_src: pd.DataFrame, cache=None) -> BytesIO:
+    """
+    Même document que ``build_doc_from_df`` ; le XML du tableau de chaque produit est
+    mis en cache (images remplacées par le nom de l'icône) et seuls les produits
+    modifiés sont reconstruits.
+    """
+    cache = cache or get_render_cache()
+    doc = Document()
+    doc.add_paragraph()
+    image_ids = {}
+
+    def image_id(icon):
+        # rId de l'icône dans ce document (ajoutée une seule fois)
+        if icon not in image_ids:
+            image_ids[icon] = doc.part.get_or_add_image(asset_path("icones", icon))[0]
+        return image_ids[icon]
+
+    for row, key in zip(icon_records(df_src), row_keys(df_src, LAYOUT_FIELDS, LAYOUT_VERSION)):
+        fragment = cache.get(key)
+        if fragment is None:
+            tbl, icons = _add_product_table(doc, row)
+            xml = tbl.xml
+            for icon in icons:
+                xml = xml.replace(f'r:embed="{image_id(icon)}"', f'r:embed="@icone:{icon}@"')
+            cache.put(key, xml.encode("utf-8"))
+        else:
+            xml = _ICON_REF.sub(lambda m: f'r:embed="{image_id(m.group(1))}"', fragment.decode("utf-8"))
+            # Avant le <w:sectPr> final, là où ``add_table`` l'aurait placé
+            body = doc.element.body
+            section = body.find(qn("w:sectPr"))
+            if section is None:
+                body.append(parse_xml(xml))
+            else:
+                section.addprevious(parse_xml(xml))
+        doc.add_paragraph()
+
+    # Identifiants d'images uniques dans le document (les fragments repris du cache les dupliquent)
+    for n, doc_pr in enumerate(doc.element.body.iter(qn("wp:docPr")), start=1):
+        doc_pr.set("id", str(n))
+    return _save(doc)
@@ -0,0 +1,199 @@
+"""
+Création des nouveaux produits en brouillon (onglet 8), en GraphQL.
+
+Un seul ``productCreate`` par produit porte tout : variante (prix, code-barres,
+poids, suivi du stock) et metafield ``custom.taille`` en ligne. Les créations
+partent en parallèle sous le quota partagé du client ; les coûts sont ensuite
+posés par lots de mutations ``inventoryItemUpdate`` regroupées dans une même
+requête. Chaque ligne reçoit son résultat : créé ou non, coût posé ou non, motif.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from . import store
+from .catalog import METAFIELD_NAMESPACE
+from .shopify_client import ShopifyError, gid_to_id
+
+DEFAULT_CONCURRENCY = 4
+COST_BATCH_SIZE = 25
+
+CREATE_MUTATION = """
+mutation create($input: ProductInput!) {
+  productCreate(input: $input) {
+    product {
+      id
+      variants(first: 1) { edges { node { id inventoryItem { id } } } }
+    }
+    userErrors { field message }
+  }
+}
+"""
+
+RESULT_COLUMNS = ["Title", "Barcode", "Product ID", "Variant ID", "Inventory Item ID", "Créé", "Coût posé", "Motif"]
+
+
+def _text(value) -> str:
+    return "" if value is None or pd.isna(value) else str(value).strip()
+
+
+def product_input(row: dict, product_type: str = "") -> dict:
+    """Ligne de l'onglet 8 (Title, Vendor, Barcode, Size, PV conseillé EUR, Weight (g)) -> ``ProductInput``."""
+    price = row.get("PV conseillé EUR")
+    variant = {
+        "barcode": _text(row.get("Barcode")),
+        "price": f"{price:.2f}" if pd.notna(price) else "0.00",
+        "inventoryPolicy": "DENY",
+        "inventoryItem": {"tracked": True},
+    }
+    weight = pd.to_numeric(row.get("Weight (g)"), errors="coerce")
+    if pd.notna(weight):
+        variant["weight"] = float(round(weight, 3))
+        variant["weightUnit"] = "GRAMS"
+    data = {
+        "title": _text(row.get("Title")) or "Sans nom",
+        "vendor": _text(row.get("Vendor")),
+        "status": "DRAFT",
+        "variants": [variant],
+    }
+    if product_type and product_type.strip():
+        data["productType"] = product_type.strip()
+    size = _text(row.get("Size"))
+    if size:
+        data["metafields"] = [{
+            "namespace": METAFIELD_NAMESPACE,
+            "key": "taille",
+            "type": "single_line_text_field",
+            "value": size,
+        }]
+    return data
+
+
+def create_draft(client, row: dict, product_type: str = "") -> dict:
+    """Crée un produit ; renvoie les ID (product, variant, inventory item) ou lève ShopifyError."""
+    result = client.graphql(CREATE_MUTATION, {"input": product_input(row, product_type)}).get("productCreate") or {}
+    errors = result.get("userErrors") or []
+    if errors:
+        raise ShopifyError("; ".join(e.get("message", "") for e in errors))
+    product = result.get("product") or {}
+    edges = (product.get("variants") or {}).get("edges") or [{}]
+    variant = edges[0].get("node") or {}
+    return {
+        "Product ID": gid_to_id(product.get("id")),
+        "Variant ID": gid_to_id(variant.get("id")),
+        "Inventory Item ID": gid_to_id((variant.get("inventoryItem") or {}).get("id")),
+    }
+
+
+def cost_mutation(n: int) -> str:
+    """Document GraphQL de ``n`` ``inventoryItemUpdate`` (alias c0, c1...)."""
+    params = ", ".join(f"$id{i}: ID!, $input{i}: InventoryItemUpdateInput!" for i in range(n))
+    fields = "\n".join(
+        f"  c{i}: inventoryItemUpdate(id: $id{i}, input: $input{i}) {{ inventoryItem {{ id }} userErrors {{ message }} }}"
+        for i in range(n)
+    )
+    return f"mutation costs({params}) {{\n{fields}\n}}"
+
+
+def set_costs(client, costs, batch_size: int = COST_BATCH_SIZE) -> dict:
+    """
+    Coûts d'achat ``[(inventory_item_id, coût EUR), ...]`` en ``ceil(n / batch_size)`` requêtes.
+    Renvoie {inventory_item_id: motif d'échec} (vide si tout est passé).
+    """
+    failed = {}
+    for start in range(0, len(costs), batch_size):
+        chunk = costs[start:start + batch_size]
+        variables = {}
+        for i, (item_id, cost) in enumerate(chunk):
+            variables[f"id{i}"] = f"gid://shopify/InventoryItem/{item_id}"
+            variables[f"input{i}"] = {"cost": float(round(cost, 2))}
+        try:
+            data = client.graphql(cost_mutation(len(chunk)), variables)
+        except ShopifyError as e:
+            failed.update({item_id: str(e) for item_id, _ in chunk})
+            continue
+        for i, (item_id, _) in enumerate(chunk):
+            errors = (data.get(f"c{i}") or {}).get("userErrors") or []
+            if errors:
+                failed[item_id] = "; ".join(e.get("message", "") for e in errors)
+    return failed
+
+
+def create_drafts(client, rows: pd.DataFrame, product_type: str = "", concurrency: int = DEFAULT_CONCURRENCY,
+                  on_progress=None) -> pd.DataFrame:
+    """
+    Crée en brouillon chaque ligne de ``rows`` (``concurrency`` créations en parallèle),
+    puis pose les coûts (``Cost EUR``) par lots. ``on_progress(fait, total, produits_par_s)``
+    est appelé depuis le thread appelant.
+
+    Renvoie une ligne de résultat par produit, dans l'ordre de ``rows`` (``RESULT_COLUMNS``).
+    """
+    records = rows.to_dict("records")
+    report = pd.DataFrame({
+        "Title": [_text(r.get("Title")) or "Sans nom" for r in records],
+        "Barcode": [_text(r.get("Barcode")) for r in records],
+        "Product ID": None,
+        "Variant ID": None,
+        "Inventory Item ID": None,
+        "Créé": False,
+        "Coût posé": False,
+        "Motif": "",
+    }, columns=RESULT_COLUMNS)
+
+    total = len(records)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        futures = {pool.submit(create_draft, client, r, product_type): pos for pos, r in enumerate(records)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            pos = futures[future]
+            try:
+                ids = future.result()
+            except Exception as e:
+                report.loc[pos, "Motif"] = f"Création refusée : {e}"
+            else:
+                for col, value in ids.items():
+                    report.at[pos, col] = value
+                report.loc[pos, "Créé"] = True
+            if on_progress:
+                elapsed = time.monotonic() - start
+                on_progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+
+    costs = {}
+    for pos, r in enumerate(records):
+        cost, item_id = pd.to_numeric(r.get("Cost EUR"), errors="coerce"), report.at[pos, "Inventory Item ID"]
+        if not report.at[pos, "Créé"]:
+            continue
+        if pd.isna(cost) or item_id is None:
+            report.loc[pos, "Motif"] = "Pas de coût à poser"
+        else:
+            costs[pos] = (item_id, float(cost))
+    failed = set_costs(client, list(costs.values())) if costs else {}
+    for pos, (item_id, _) in costs.items():
+        if item_id in failed:
+            report.loc[pos, "Motif"] = f"Coût non posé : {failed[item_id]}"
+        else:
+            report.loc[pos, "Coût posé"] = True
+    return report
+
+
+def record_created(report: pd.DataFrame, rows: pd.DataFrame, db_path: str = store.DB_PATH):
+    """Ajoute les variantes créées à la table ``variants`` : elles sortent de la liste des nouveautés."""
+    created = report["Créé"].to_numpy()
+    prices = rows["PV conseillé EUR"].to_numpy()[created]
+    variant_rows = [
+        {
+            "variant_id": r["Variant ID"],
+            "product_id": r["Product ID"],
+            "barcode": r["Barcode"],
+            "inventory_item_id": r["Inventory Item ID"],
+            "title": r["Title"],
+            "variant_title": "Default Title",
+            "price": f"{price:.2f}" if pd.notna(price) else "0.00",
+            "compare_at_price": None,
+            "tags": "",
+        }
+        for r, price in zip(report[created].to_dict("records"), prices)
+    ]
+    if variant_rows:
+        store.apply_variant_changes(variant_rows, product_ids=[r["product_id"] for r in variant_rows], db_path=db_path)
@@ -0,0 +1,222 @@
+"""Stocks Shopify par lots : lecture (« Stock actuel » des bons fournisseur) et ajustements groupés."""
+import hashlib
+import json
+
+import pandas as pd
+
+from . import store
+from .orders import extraire_barcode
+from .shopify_client import ShopifyError
+
+# inventory_levels.json accepte jusqu'à 50 inventory_item_ids par appel
+INVENTORY_BATCH_SIZE = 50
+
+
+def get_primary_location_id(client):
+    """Premier emplacement de la boutique (None si l'appel échoue)."""
+    resp = client.get("locations.json")
+    if not resp.ok:
+        return None
+    locations = resp.json().get("locations", [])
+    return locations[0]["id"] if locations else None
+
+
+def fetch_inventory_levels(client, inventory_item_ids, location_id, batch_size: int = INVENTORY_BATCH_SIZE) -> dict:
+    """
+    Stock disponible par inventory_item_id, en ``ceil(n / batch_size)`` appels.
+    Un article sans niveau à cet emplacement vaut 0 ; un lot en erreur est absent du résultat.
+    """
+    ids = sorted({int(i) for i in inventory_item_ids if pd.notna(i)})
+    levels = {}
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        params = {
+            "inventory_item_ids": ",".join(str(i) for i in chunk),
+            "location_ids": location_id,
+            "limit": 250,
+        }
+        resp = client.get("inventory_levels.json", params=params)
+        if not resp.ok:
+            continue
+        levels.update({i: 0 for i in chunk})
+        for level in resp.json().get("inventory_levels", []):
+            levels[int(level["inventory_item_id"])] = level.get("available") or 0
+    return levels
+
+
+def preparer_stock(df_fournisseur: pd.DataFrame, client, df_variants: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bon StyleKorean (Product Name, Qty) -> lignes fusionnées avec les variantes Shopify,
+    plus « Stock actuel » et « location_id ».
+    """
+    df_fournisseur = df_fournisseur.copy()
+    df_fournisseur['Barcode'] = df_fournisseur['Product Name'].apply(extraire_barcode)
+    df_fournisseur['Qty'] = (
+        df_fournisseur['Qty']
+        .astype(str)
+        .str.extract(r'(\d+)')[0]
+        .fillna(0)
+        .astype(int)
+    )
+
+    df_merged = pd.merge(df_fournisseur, df_variants, on="Barcode", how="left")
+
+    location_id = get_primary_location_id(client)
+    if location_id is None:
+        df_merged["Stock actuel"] = None
+    else:
+        levels = fetch_inventory_levels(client, df_merged["Inventory Item ID"].dropna(), location_id)
+        df_merged["Stock actuel"] = [
+            None if pd.isna(item_id) else levels.get(int(item_id))
+            for item_id in df_merged["Inventory Item ID"]
+        ]
+    df_merged["location_id"] = location_id
+    return df_merged
+
+
+# --- Ajustements groupés (GraphQL inventoryAdjustQuantities) ------------------
+
+ADJUST_BATCH_SIZE = 100
+
+ADJUST_MUTATION = """
+mutation adjust($input: InventoryAdjustQuantitiesInput!) {
+  inventoryAdjustQuantities(input: $input) {
+    inventoryAdjustmentGroup { id }
+    userErrors { field message }
+  }
+}
+"""
+
+RESULT_COLUMNS = ["Product Name", "Barcode", "Demandé", "Appliqué", "Échec", "Motif"]
+
+
+ALREADY_APPLIED = "Déjà appliqué (reprise)"
+
+
+def order_key(order_ref: str, changes) -> str:
+    """
+    Empreinte d'un bon : ``order_ref`` (empreinte du fichier importé) plus les lignes
+    (article, emplacement, quantité). Le même fichier relancé donne la même clé ; un
+    nouveau réassort aux mêmes lignes, importé depuis un autre fichier, en donne une autre.
+    """
+    payload = json.dumps([order_ref, sorted(changes)], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _error_index(field) -> int:
+    # ['input', 'changes', '3', 'inventoryItemId'] -> 3
+    field = list(field or [])
+    if "changes" in field and field.index("changes") + 1 < len(field):
+        try:
+            return int(field[field.index("changes") + 1])
+        except ValueError:
+            return None
+    return None
+
+
+def _send_adjustments(client, changes, reason, reference):
+    """
+    Envoie un lot ; si Shopify rejette certaines lignes, les retire et renvoie le reste une fois.
+    Renvoie (indices appliqués, {indice: motif d'échec}).
+    """
+    pending = list(range(len(changes)))
+    failed = {}
+    for _ in range(2):
+        if not pending:
+            break
+        payload = {
+            "reason": reason,
+            "name": "available",
+            "referenceDocumentUri": reference,
+            "changes": [
+                {
+                    "delta": changes[i][2],
+                    "inventoryItemId": f"gid://shopify/InventoryItem/{changes[i][0]}",
+                    "locationId": f"gid://shopify/Location/{changes[i][1]}",
+                }
+                for i in pending
+            ],
+        }
+        try:
+            result = client.graphql(ADJUST_MUTATION, {"input": payload}).get("inventoryAdjustQuantities") or {}
+        except ShopifyError as e:
+            failed.update({i: str(e) for i in pending})
+            return [], failed
+        errors = result.get("userErrors") or []
+        if not errors:
+            return pending, failed
+        rejected = {}
+        for err in errors:
+            idx = _error_index(err.get("field"))
+            if idx is not None and idx < len(pending):
+                rejected[pending[idx]] = err.get("message", "")
+        if not rejected:
+            message = "; ".join(e.get("message", "") for e in errors)
+            failed.update({i: message for i in pending})
+            return [], failed
+        failed.update(rejected)
+        pending = [i for i in pending if i not in rejected]
+    failed.update({i: "Lot rejeté par Shopify" for i in pending})
+    return [], failed
+
+
+def adjust_inventory_bulk(client, lines: pd.DataFrame, reason: str = "received", batch_size: int = ADJUST_BATCH_SIZE,
+                          order_ref: str = None, db_path: str = store.DB_PATH) -> pd.DataFrame:
+    """
+    Ajoute ``Qty`` au stock de chaque ligne (colonnes Product Name, Barcode,
+    Inventory Item ID, location_id, Qty) en lots ``inventoryAdjustQuantities``.
+    Les quantités d'un même article sont cumulées avant l'envoi.
+
+    Avec ``order_ref`` (empreinte du fichier du bon), chaque ligne appliquée est inscrite
+    au journal (clé = empreinte du bon + article + emplacement) : relancer le même fichier
+    après une interruption ou un échec partiel n'envoie que les lignes pas encore passées.
+    Sans ``order_ref``, pas de journal : tout est envoyé.
+
+    Renvoie le tableau de rapprochement : Demandé, Appliqué, Échec, Motif par ligne.
+    """
+    report = pd.DataFrame({
+        "Product Name": lines["Product Name"].values,
+        "Barcode": lines["Barcode"].values,
+        "Demandé": lines["Qty"].astype(int).values,
+        "Appliqué": 0,
+        "Échec": False,
+        "Motif": "",
+    }, columns=RESULT_COLUMNS)
+
+    # Regroupement par (article, emplacement) -> indices des lignes du bon
+    grouped = {}
+    for pos, (item_id, location_id, qty) in enumerate(zip(lines["Inventory Item ID"], lines["location_id"], lines["Qty"])):
+        if pd.isna(item_id) or pd.isna(location_id):
+            report.loc[pos, ["Échec", "Motif"]] = [True, "Produit introuvable dans Shopify"]
+        elif int(qty) == 0:
+            report.loc[pos, "Motif"] = "Quantité nulle"
+        else:
+            grouped.setdefault((int(item_id), int(location_id)), []).append(pos)
+
+    changes = [(item, loc, int(report.loc[positions, "Demandé"].sum())) for (item, loc), positions in grouped.items()]
+    line_groups = list(grouped.values())
+    use_journal = order_ref is not None
+    key = order_key(order_ref, changes) if use_journal else ""
+    line_keys = [f"{key}:{item}:{loc}" for item, loc, _ in changes]
+    already_done = store.journal_entries(line_keys, db_path) if use_journal else set()
+
+    todo = []
+    for i, line_key in enumerate(line_keys):
+        if line_key in already_done:
+            report.loc[line_groups[i], "Motif"] = ALREADY_APPLIED
+        else:
+            todo.append(i)
+
+    for start in range(0, len(todo), batch_size):
+        batch = todo[start:start + batch_size]
+        reference = f"yoomi://stock/{key or 'direct'}/{start // batch_size}"
+        applied, failed = _send_adjustments(client, [changes[i] for i in batch], reason, reference)
+        for local in applied:
+            positions = line_groups[batch[local]]
+            report.loc[positions, "Appliqué"] = report.loc[positions, "Demandé"]
+        for local, message in failed.items():
+            report.loc[line_groups[batch[local]], ["Échec", "Motif"]] = [True, message]
+        if use_journal and applied:
+            # Seules les lignes passées : celles en échec repartent à la relance
+            store.journal_record([line_keys[batch[local]] for local in applied], reference, db_path)
+    return report
@@ -0,0 +1,63 @@
+"""Récupération concurrente des metafields ``custom.*`` produit par produit (API REST)."""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .catalog import METAFIELD_KEYS, METAFIELD_NAMESPACE, metafields_to_data
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+
+
+def _missing_keys(metafields, data: dict) -> set:
+    """Clés custom présentes chez Shopify mais revenues vides."""
+    return {
+        m.get("key") for m in metafields
+        if m.get("namespace") == METAFIELD_NAMESPACE and m.get("key") in METAFIELD_KEYS and not data.get(m.get("key"))
+    }
+
+
+def fetch_product_metafields(client, product_id, retries: int = DEFAULT_RETRIES):
+    """
+    Lit les metafields d'un produit. Si des valeurs reviennent vides, la liste
+    complète est relue (au plus ``retries`` fois pour le produit, pas par clé).
+    Renvoie (metafield_data, complet).
+    """
+    data = {key: "" for key in METAFIELD_KEYS}
+    for attempt in range(retries + 1):
+        resp = client.get(f"products/{product_id}/metafields.json")
+        resp.raise_for_status()
+        metafields = resp.json().get("metafields", [])
+        for key, value in metafields_to_data(metafields).items():
+            if value:
+                data[key] = value
+        if not _missing_keys(metafields, data):
+            return data, True
+    return data, False
+
+
+def fetch_metafields_concurrent(client, products, concurrency: int = DEFAULT_CONCURRENCY,
+                                retries: int = DEFAULT_RETRIES, on_progress=None):
+    """
+    Récupère les metafields de ``products`` avec ``concurrency`` requêtes en parallèle.
+    Le quota reste géré par le client partagé. ``on_progress(fait, total, produits_par_s)``
+    est appelé depuis le thread appelant.
+    Renvoie (dict id -> metafield_data, liste des ids incomplets ou en erreur).
+    """
+    results, failed = {}, []
+    total = len(products)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        futures = {pool.submit(fetch_product_metafields, client, p.get("id"), retries): p.get("id") for p in products}
+        for done, future in enumerate(as_completed(futures), start=1):
+            product_id = futures[future]
+            try:
+                data, complete = future.result()
+            except Exception:
+                data, complete = {key: "" for key in METAFIELD_KEYS}, False
+            results[product_id] = data
+            if not complete:
+                failed.append(product_id)
+            if on_progress:
+                elapsed = time.monotonic() - start
+                on_progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+    return results, failed
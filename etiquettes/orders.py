@@ -0,0 +1,244 @@
+"""Bons de commande fournisseurs : StyleKorean (CSV) et QUDO (texte copié du PDF)."""
+import io
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+
+from . import units
+
+
+def extraire_barcode(nom):
+    match = re.search(r'barcode[\s:-]*([\d]{8,14})', str(nom), re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+# --- Factures QUDO ------------------------------------------------------------
+#
+# Lecture ligne par ligne (générateur) : chaque ligne est classée comme début
+# d'article « N (barcode|MOSTRE) ... », suite d'un nom coupé sur plusieurs
+# lignes, ou bruit de saut de page (en-tête du tableau, « Page 2/3 »).
+# Aucune expression ne traverse les lignes : pas de retour arrière catastrophique
+# sur les longs textes ou les lignes mal formées.
+
+QUDO_COLUMNS = ["Product Name", "Barcode", "Unit", "Qty", "Unit Price EUR", "Line Value EUR", "VAT EUR"]
+
+# Lignes de suite autorisées pour un nom coupé avant d'abandonner l'article
+QUDO_MAX_NAME_LINES = 4
+
+_QUDO_START = re.compile(r"^(\d+)\s*\((\d{8,14}|MOSTRE)\)\s*(.*)$", re.IGNORECASE)
+# Un article peut commencer au milieu d'une ligne (texte copié sans retours à la ligne)
+_QUDO_SPLIT = re.compile(r"\s+(?=\d+\s*\((?:\d{8,14}|MOSTRE)\))", re.IGNORECASE)
+_TAIL = r"""
+    (?P<unit>pcs|set|box|ea)\s+                  # unité
+    (?P<qty>\d+)\s+                             # quantité
+    (?P<unit_price>\d+[.,]?\d*)\s+              # prix unitaire
+    (?P<value>\d+[.,]?\d*)\s+                   # montant ligne
+    (?P<vat>\d+[.,]?\d*)(?=\s|$)                # tva
+"""
+_QUDO_TAIL = re.compile(r"(?:^|\s)" + _TAIL, re.IGNORECASE | re.VERBOSE)
+# Cas courant : article complet sur une seule ligne
+_QUDO_ITEM = re.compile(
+    r"^\d+\s*\((?P<bc>\d{8,14}|MOSTRE)\)\s*(?P<name>.*?)\s" + _TAIL, re.IGNORECASE | re.VERBOSE
+)
+_QUDO_PAGE_MARK = re.compile(r"^(?:page\s*)?\d+\s*(?:/|of|sur)\s*\d+$|^page\s*\d+$", re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class QudoLine:
+    line_no: int
+    barcode: str
+    name: str
+    unit: str
+    qty: int
+    unit_price: float
+    value: float
+    vat: float
+
+
+@dataclass(slots=True)
+class UnparsedLine:
+    line_no: int
+    text: str
+
+
+def _fnum(x: str) -> float:
+    return float(x.replace(",", "."))
+
+
+def _item(line_no: int, barcode: str, name: str, m) -> QudoLine:
+    unit, qty, unit_price, value, vat = m.group("unit", "qty", "unit_price", "value", "vat")
+    return QudoLine(line_no, barcode, name.strip(" -"), unit.lower(), int(qty), _fnum(unit_price), _fnum(value), _fnum(vat))
+
+
+def _is_page_noise(segment: str) -> bool:
+    """Numéro de page ou en-tête du tableau répété en haut de chaque page."""
+    lower = segment.lower()
+    return bool(_QUDO_PAGE_MARK.match(segment)) or ("qty" in lower and ("price" in lower or "unit" in lower))
+
+
+def _qudo_segments(lines):
+    """(n° de ligne, segment) : espaces normalisés, un segment par début d'article."""
+    for line_no, line in enumerate(lines, start=1):
+        line = " ".join(line.replace("–", "-").replace("—", "-").split())   # split() coupe aussi sur \f
+        if not line:
+            continue
+        if line.count("(") > 1:
+            for segment in _QUDO_SPLIT.split(line):
+                yield line_no, segment
+        else:
+            yield line_no, line
+
+
+def iter_qudo(lines):
+    """
+    Parcourt une facture QUDO (lignes de texte, fichier ouvert...) sans la charger
+    en entier. Produit des ``QudoLine`` et, pour ce qui n'a pas pu être lu à
+    l'intérieur du tableau, des ``UnparsedLine`` (n° de ligne d'origine).
+    Le texte avant le premier article et après le dernier est ignoré.
+    """
+    parts = []       # lignes de l'article en cours : [(n° de ligne, texte)]
+    orphans = []     # lignes hors article, signalées seulement si un article suit
+    barcode, rest = "", ""
+    in_table = False
+
+    for line_no, segment in _qudo_segments(lines):
+        full = _QUDO_ITEM.match(segment)
+        if full:
+            for no, text in parts + orphans:
+                yield UnparsedLine(no, text)
+            parts, orphans, in_table = [], [], True
+            yield _item(line_no, full.group("bc"), full.group("name"), full)
+            continue
+
+        start = _QUDO_START.match(segment)
+        if start:
+            for no, text in parts + orphans:
+                yield UnparsedLine(no, text)
+            orphans = []
+            in_table = True
+            parts = [(line_no, segment)]
+            barcode, rest = start.group(2), start.group(3)
+        elif _is_page_noise(segment):
+            continue
+        elif parts:
+            parts.append((line_no, segment))
+            rest = f"{rest} {segment}".strip()
+        else:
+            if in_table:
+                orphans.append((line_no, segment))
+            continue
+
+        tail = _QUDO_TAIL.search(rest)
+        if tail:
+            yield _item(parts[0][0], barcode, rest[:tail.start()], tail)
+            parts = []
+        elif len(parts) > QUDO_MAX_NAME_LINES:
+            for no, text in parts:
+                yield UnparsedLine(no, text)
+            parts = []
+
+    for no, text in parts:
+        yield UnparsedLine(no, text)
+
+
+def parse_qudo_lines(lines, include_samples: bool = False):
+    """Facture QUDO -> (DataFrame ``QUDO_COLUMNS``, liste des ``UnparsedLine``)."""
+    rows, unparsed = [], []
+    for item in iter_qudo(lines):
+        if isinstance(item, UnparsedLine):
+            unparsed.append(item)
+        elif include_samples or item.barcode.upper() != "MOSTRE":
+            rows.append((item.name, item.barcode, item.unit, item.qty, item.unit_price, item.value, item.vat))
+    return pd.DataFrame(rows, columns=QUDO_COLUMNS), unparsed
+
+
+def parse_qudo_text_to_df(text: str, include_samples: bool = False) -> pd.DataFrame:
+    """
+    Attend des lignes du type:
+      1 (8809738316993) Beauty of Joseon - Red Bean Water Gel 100ml pcs 15 8.00 120.00 0.00
+      2 (MOSTRE) Sample cream 2ml pcs 1 0.01 0.01 0.00
+    Le nom peut être coupé sur plusieurs lignes et le tableau sur plusieurs pages.
+    Retourne: Product Name, Barcode, Unit, Qty, Unit Price EUR, Line Value EUR, VAT EUR ;
+    les lignes illisibles sont dans ``df.attrs["unparsed"]`` (liste de ``UnparsedLine``).
+    """
+    df, unparsed = parse_qudo_lines(io.StringIO(text or ""), include_samples)
+    df.attrs["unparsed"] = unparsed
+    return df
+
+
+# --- Noms de produits fournisseurs (colonnes entières) -------------------------
+
+_QUDO_VENDOR = re.compile(r"^\s*([^-\[\]]{2,}?)\s*-\s*(.+)$")
+_SK_BARCODE = re.compile(r"(?i)bar\s*code\s*[:\-]?\s*([0-9]{8,14})")
+_SK_VENDOR = re.compile(r"^\s*\[([^\]]+)\]")
+# Unités StyleKorean : minuscules ou majuscules, pas de casse mixte (« Kg » reste dans le titre)
+SK_SIZE_UNITS = "ml|mL|ML|g|G|kg|KG|l|L|cl|CL|mg|MG|oz|OZ"
+# « Retail Price » : premier nombre du texte, puis premier nombre de la ligne chiffrée suivante
+_RETAIL_NUMBERS = re.compile(
+    r"^[^\d]*(?P<first>\d[\d,]*\.?\d*)"
+    r"(?:[^\r\n]*[\r\n]+(?:[^\d\r\n]*[\r\n]+)*[^\d\r\n]*(?P<second>\d[\d,]*\.?\d*))?"
+)
+
+
+def parse_qudo_names(names: pd.Series, default_vendor: str = "") -> pd.DataFrame:
+    """
+    Découpe 'Vendor - Title Size' (ou juste 'Title Size') pour toute la colonne.
+    Colonnes : Vendor, Title, Size ('50 ml'), Size Qty, Size Unit, Size (g/ml).
+    """
+    text = units.as_text(names).str.strip().str.replace("–", "-", regex=False).str.replace("—", "-", regex=False)
+    dash = text.str.extract(_QUDO_VENDOR)
+    vendor = dash[0].str.strip().fillna(default_vendor)
+    main = dash[1].str.strip().fillna(text)
+
+    sizes = units.last_size(main)
+    at_end = sizes["matched"] & (sizes["after"].str.strip() == "")
+    main = sizes["before"].str.strip().where(at_end, main)
+    return pd.concat([
+        pd.DataFrame({"Vendor": vendor, "Title": units.smart_title(main)}, index=names.index),
+        units.size_columns(sizes),
+    ], axis=1)
+
+
+def parse_stylekorean_names(names: pd.Series) -> pd.DataFrame:
+    """
+    "[ANUA] [EU] HEARTLEAF PORE DEEP CLEANSING FOAM 150ml BarCode: 8809640735622 ( Pieces per box : 40 ea )"
+    -> Vendor (premier [ ... ]), Title, Size, Size Qty, Size Unit, Size (g/ml), Barcode (8-14 chiffres).
+    """
+    text = units.as_text(names).str.strip()
+    barcode = text.str.extract(_SK_BARCODE)[0]
+    vendor = text.str.extract(_SK_VENDOR)[0].str.strip().fillna("")
+    main = (
+        text.str.replace(r"(?is)bar\s*code.*", "", regex=True)
+        .str.replace(r"^\s*(?:\[[^\]]+\]\s*)+", "", regex=True)
+        .str.strip()
+    )
+    sizes = units.last_size(main, SK_SIZE_UNITS, flags=0)
+    main = (sizes["before"] + sizes["after"]).str.strip().where(sizes["matched"], main)
+    main = main.str.replace(r"\s{2,}", " ", regex=True).str.strip()
+    return pd.concat([
+        pd.DataFrame({"Vendor": vendor, "Title": units.smart_title(main)}, index=names.index),
+        units.size_columns(sizes),
+        barcode.rename("Barcode"),
+    ], axis=1)
+
+
+def retail_usd(retail: pd.Series) -> pd.Series:
+    """
+    « Retail Price » StyleKorean 'KRW 14,000\\n5.55\\n53.00%' -> 5.55 : premier nombre de la
+    2e ligne chiffrée (de la 1re s'il n'y en a qu'une), NaN sinon.
+    """
+    found = units.as_text(retail).str.extract(_RETAIL_NUMBERS)
+    first, second = (pd.to_numeric(found[col].str.replace(",", "", regex=False), errors="coerce")
+                     for col in ("first", "second"))
+    return second.fillna(first).astype("float64").rename(retail.name)
+
+
+def order_barcodes(path: str) -> list:
+    """Barcodes d'un bon : CSV StyleKorean (« Product Name ») ou TXT QUDO, selon l'extension."""
+    if path.lower().endswith(".txt"):
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            df_txt, _ = parse_qudo_lines(f, include_samples=False)
+        return df_txt["Barcode"].astype(str).unique().tolist()
+    df_commande = pd.read_csv(path)
+    return df_commande["Product Name"].apply(extraire_barcode).dropna().unique().tolist()
@@ -0,0 +1,158 @@
+"""
+Préparation vectorisée des lignes du catalogue pour les moteurs de rendu.
+
+Les tests « champ rempli », « vrai/faux », le choix des icônes et le formatage des
+prix sont faits une fois par colonne (opérations pandas) au lieu d'être refaits
+cellule par cellule dans la boucle de dessin.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+TRUE_VALUES = ["true", "1"]
+
+# (champ, libellé peau, libellé cheveux) dans l'ordre d'affichage
+SKIN_TYPES_P = [
+    ("custom.tout_type", "• tout type"), ("custom.peau_acneique", "• acnéique"),
+    ("custom.peau_grasse", "• grasse"), ("custom.peau_seche", "• sèche"),
+    ("custom.peau_sensible", "• sensible"), ("custom.peau_mature", "• mature"),
+]
+HAIR_TYPES_C = [
+    ("custom.tout_type", "• tout type"), ("custom.peau_grasse", "• gras"),
+    ("custom.peau_seche", "• sec"), ("custom.peau_sensible", "• sensible"),
+]
+
+
+@dataclass(slots=True)
+class PriceLabelRow:
+    vendor: str
+    title: str
+    taille: str
+    description: str
+    routine: str
+    vegan: bool
+    cruelty_free: bool
+    clean_beauty: bool
+    skin_types: str      # « Type de peau : • tout type • grasse » ou ''
+    price: str           # « 35,90€ » ou ''
+    compare_price: str   # prix barré, seulement s'il est supérieur au prix
+    price_error: str     # prix illisible : message affiché à la place
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name] if name in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def text_column(series: pd.Series) -> pd.Series:
+    """Texte nettoyé ; '' pour NaN, None, vide ou 'nan'."""
+    s = series.astype(str).str.strip()
+    return s.where(series.notna() & (s != "") & (s.str.lower() != "nan"), "")
+
+
+def product_labels(df: pd.DataFrame) -> pd.Series:
+    """Libellé « Vendor - Title (taille) » lisible même si certaines colonnes sont vides."""
+    tailles = text_column(df['custom.taille'])
+    tailles = (' (' + tailles + ')').where(tailles != '', '')
+    vendors = df['Vendor'].astype(object).fillna('').astype(str)
+    titles = df['Title'].astype(object).fillna('').astype(str)
+    return (vendors + ' - ' + titles + tailles).str.replace(r'^\s*-\s*', '', regex=True).str.strip()
+
+
+def flag_column(series: pd.Series, true_values=("true",)) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        # booléens nullables du modèle compact : <NA> vaut faux
+        return series.fillna(False).astype(bool)
+    return series.astype(str).str.strip().str.lower().isin(true_values)
+
+
+def _parse_price(series: pd.Series):
+    raw = text_column(series)
+    values = pd.to_numeric(raw.str.replace(",", ".", regex=False), errors="coerce")
+    return raw, values
+
+
+def _price_error(value) -> str:
+    try:
+        float(str(value).replace(",", "."))
+    except ValueError as e:
+        return f"Erreur prix: {e}"
+    return ""
+
+
+def _format_price(values: pd.Series) -> pd.Series:
+    return values.map(lambda v: f"{v:.2f}".replace(".", ",") + "€" if pd.notna(v) else "")
+
+
+def _types_column(flags: dict, types, n: int) -> np.ndarray:
+    out = np.full(n, "", dtype=object)
+    for field, label in types:
+        out = out + np.where(flags[field], " " + label, "")
+    return out
+
+
+def skin_types_column(df: pd.DataFrame) -> pd.Series:
+    """« Type de peau : • ... » (Type P) ou « Type de cheveux : • ... » (Type C), '' sinon."""
+    kind = text_column(_column(df, "Type"))
+    fields = {field for field, _ in SKIN_TYPES_P + HAIR_TYPES_C}
+    flags = {field: flag_column(_column(df, field), TRUE_VALUES).to_numpy() for field in fields}
+    skin = pd.Series(_types_column(flags, SKIN_TYPES_P, len(df)), index=df.index)
+    hair = pd.Series(_types_column(flags, HAIR_TYPES_C, len(df)), index=df.index)
+    out = pd.Series("", index=df.index, dtype=object)
+    out = out.mask((kind == "P") & (skin != ""), "Type de peau :" + skin)
+    out = out.mask((kind == "C") & (hair != ""), "Type de cheveux :" + hair)
+    return out
+
+
+def prepare_price_rows(df: pd.DataFrame) -> list:
+    """Catalogue -> liste de PriceLabelRow, dans l'ordre des lignes."""
+    raw_price, price = _parse_price(_column(df, "Variant Price"))
+    _, compare = _parse_price(_column(df, "Variant Compare Price"))
+    show_compare = price.notna() & compare.notna() & (compare > price)
+    price_error = pd.Series("", index=df.index, dtype=object)
+    invalid = (raw_price != "") & price.isna()
+    if invalid.any():
+        # rare : message d'erreur identique à celui de float()
+        price_error[invalid] = _column(df, "Variant Price")[invalid].map(_price_error)
+
+    columns = {
+        "vendor": text_column(_column(df, "Vendor")),
+        "title": text_column(_column(df, "Title")),
+        "taille": text_column(_column(df, "custom.taille")),
+        "description": text_column(_column(df, "custom.moyenne_description")),
+        "routine": text_column(_column(df, "custom.routine")),
+        "vegan": flag_column(_column(df, "custom.info_vegan")),
+        "cruelty_free": flag_column(_column(df, "custom.info_cruelty_free")),
+        "clean_beauty": flag_column(_column(df, "custom.info_clean_beauty")),
+        "skin_types": skin_types_column(df),
+        "price": _format_price(price),
+        "compare_price": _format_price(compare.where(show_compare)),
+        "price_error": price_error,
+    }
+    return [PriceLabelRow(*values) for values in zip(*(col.tolist() for col in columns.values()))]
+
+
+def pao_icon_column(series: pd.Series) -> pd.Series:
+    """custom.periode_mois -> 'pao_{n}m.png' (pao_12m.png si vide ou illisible)."""
+    months = np.trunc(pd.to_numeric(series, errors="coerce"))
+    months = months.where(np.isfinite(months))
+    names = "pao_" + months.astype("Int64").astype(str) + "m.png"
+    return names.where(months.notna(), "pao_12m.png")
+
+
+def tri_icon_column(series: pd.Series) -> pd.Series:
+    """custom.texte_recyclage -> '{texte_en_minuscules}.png' (tri_standard.png si vide)."""
+    # map(str) plutôt que astype(str) : None doit donner 'none', comme str(None)
+    s = series.astype(object).map(str).str.strip().str.lower().str.replace(" ", "_", regex=False)
+    return (s + ".png").where(~s.isin(["", "nan"]), "tri_standard.png")
+
+
+def icon_records(df: pd.DataFrame) -> list:
+    """Lignes en dictionnaires, avec les noms d'icônes PAO / tri déjà calculés."""
+    records = df.to_dict("records")
+    pao = pao_icon_column(_column(df, "custom.periode_mois")).tolist()
+    tri = tri_icon_column(_column(df, "custom.texte_recyclage")).tolist()
+    for record, pao_icon, tri_icon in zip(records, pao, tri):
+        record["_pao_icon"] = pao_icon
+        record["_tri_icon"] = tri_icon
+    return records
@@ -0,0 +1,72 @@
+"""
+Aperçus des étiquettes de traduction : PDF et vignettes calculés à la demande,
+gardés en mémoire par empreinte de la ligne produit (voir ``render_cache.row_key``).
+
+Un rerun Streamlit qui ne change pas la sélection ne re-rend donc rien.
+"""
+import threading
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+
+from . import translation_labels
+from .render_cache import get_render_cache, row_key
+
+THUMB_DPI = 72
+FULL_DPI = 200
+MAX_ENTRIES = 600
+
+
+class LRUCache:
+    """Cache borné en nombre d'entrées, partagé par les sessions du processus."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = factory()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache = LRUCache()
+
+
+def translation_key(row) -> str:
+    return row_key(row, translation_labels.LAYOUT_FIELDS, translation_labels.LAYOUT_VERSION)
+
+
+def translation_pdf(row) -> bytes:
+    """PDF d'une étiquette, rendu une seule fois tant que la ligne ne change pas (mémoire puis disque)."""
+    key = translation_key(row)
+    return _cache.get_or_create(
+        ("pdf", key),
+        lambda: get_render_cache().get_or_render(key, lambda: translation_labels.render_translation_label(row)),
+    )
+
+
+def pdf_to_png(pdf_bytes: bytes, dpi: int) -> bytes:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc[0].get_pixmap(dpi=dpi).tobytes("png")
+
+
+def translation_preview(row, dpi: int = THUMB_DPI) -> bytes:
+    """Vignette PNG (``THUMB_DPI`` par défaut, ``FULL_DPI`` sur demande)."""
+    return _cache.get_or_create(("png", dpi, translation_key(row)), lambda: pdf_to_png(translation_pdf(row), dpi))
@@ -0,0 +1,197 @@
+"""
+Étiquettes prix 86 × 55 mm, 8 par page A4 (onglet « Étiquettes prix »).
+
+Sans dépendance à Streamlit : utilisé par l'interface et par la ligne de commande.
+Les gros tirages sont rendus par paquets de pages dans plusieurs processus,
+puis les PDF partiels sont concaténés avec PyMuPDF.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import fitz  # PyMuPDF
+
+import pandas as pd
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from .assets import DocumentIcons, asset_path, register_fonts
+from .prepare import prepare_price_rows
+from .text_layout import string_width, wrap_text
+
+LABELS_PER_PAGE = 8
+MARGIN_X, MARGIN_Y = 19 * mm, 38.52 * mm
+LABEL_WIDTH, LABEL_HEIGHT = 86 * mm, 55 * mm
+
+# Description entre 22 mm et le séparateur gris à 38 mm du haut : 5 lignes de 10,2 pt
+DESC_LINE_HEIGHT = 10.2
+DESC_MAX_LINES = 5
+
+FONTS = ["IbarraRealNova-SemiBold", "IbarraRealNova-Bold", "IbarraRealNova-Regular", "AdobeSansMM", "NotoSans-Italic"]
+
+# En dessous, le démarrage des processus coûte plus que le rendu lui-même
+PARALLEL_MIN_LABELS = 200
+PAGES_PER_CHUNK = 10
+
+
+def draw_price_label(c, icons, label, x, y, label_width=LABEL_WIDTH, label_height=LABEL_HEIGHT):
+    """
+    Dessine une étiquette dont le coin bas-gauche est en (x, y).
+    ``label`` : PriceLabelRow (voir ``prepare_price_rows``) ; ``icons`` : DocumentIcons du PDF.
+    """
+    # CADRE
+    c.setFont("Helvetica", 8)
+    c.setStrokeColorRGB(0, 0, 0)
+    c.rect(x, y, label_width, label_height, stroke=0, fill=0)
+
+    # VENDOR
+    c.setFont("IbarraRealNova-SemiBold", 11.5)
+    if label.vendor:
+        vendor_text = c.beginText()
+        vendor_text.setTextOrigin(x + 2.5 * mm, y + label_height - 5 * mm)
+        # la taille est écrite à droite sur la même ligne
+        vendor_width = label_width - 5 * mm
+        if label.taille:
+            vendor_width -= string_width(label.taille, "IbarraRealNova-SemiBold", 11.5) + 3 * mm
+        for line in wrap_text(label.vendor, "IbarraRealNova-SemiBold", 11.5, vendor_width, 2):
+            vendor_text.textLine(line)
+        c.drawText(vendor_text)
+
+    # Séparateur après Vendor
+    c.setLineWidth(0.1)
+    c.line(x, y + label_height - 6.5 * mm, x + label_width, y + label_height - 6.5 * mm)
+
+    # TAILLE (à droite, si dispo)
+    if label.taille:
+        c.setFont("IbarraRealNova-SemiBold", 11.5)
+        c.drawRightString(x + label_width - 2.5 * mm, y + label_height - 5 * mm, label.taille)
+
+    # TITRE
+    if label.title:
+        c.setFont("IbarraRealNova-Bold", 14)
+        wrapped_title = wrap_text(label.title, "IbarraRealNova-Bold", 14, label_width - 5 * mm, 2)
+        line_height = 13
+        total_lines = len(wrapped_title)
+        for idx, line in enumerate(wrapped_title):
+            text_width = string_width(line, "IbarraRealNova-Bold", 14)
+            y_offset = y + label_height - 14 * mm if total_lines == 1 else y + label_height - 12 * mm - (idx * line_height)
+            c.drawString(x + (label_width - text_width) / 2, y_offset, line)
+
+    # Séparateur après Titre
+    c.setLineWidth(0.1)
+    c.line(x, y + label_height - 18 * mm, x + label_width, y + label_height - 18 * mm)
+
+    # DESCRIPTION
+    if label.description:
+        c.setFont("AdobeSansMM", 7.5)
+        line_height = DESC_LINE_HEIGHT
+        for idx, line in enumerate(wrap_text(label.description, "AdobeSansMM", 7.5, label_width - 5 * mm, DESC_MAX_LINES)):
+            c.drawString(x + 2.5 * mm, y + label_height - 22 * mm - (idx * line_height), line)
+
+    # Séparateur (gris)
+    c.setLineWidth(0.1)
+    c.setStrokeColorRGB(0.7, 0.7, 0.7)
+    c.line(x, y + label_height - 38 * mm, x + label_width, y + label_height - 38 * mm)
+    c.setStrokeColorRGB(0, 0, 0)
+
+    # ROUTINE
+    if label.routine:
+        c.setFont("IbarraRealNova-Regular", 7)
+        c.setFillColorRGB(0.4, 0.4, 0.4)
+        c.drawRightString(x + label_width - 2.5 * mm, y + 9 * mm, f"Étape n° {label.routine}")
+        c.setFillColorRGB(0, 0, 0)
+
+    # ICONES CONDITIONNELLES
+    icon_size = 12 * mm
+    icon_y = y + label_height - 53 * mm
+    icon_x = x + 2 * mm
+    for shown, icon in ((label.vegan, "vegan.png"), (label.cruelty_free, "cruelty.png"), (label.clean_beauty, "clean.png")):
+        if not shown:
+            continue
+        try:
+            icons.draw(asset_path("images", icon), icon_x, icon_y, icon_size, icon_size)
+        except Exception:
+            c.setFillColorRGB(1, 0, 0); c.rect(icon_x, icon_y, icon_size, icon_size, fill=1)
+        icon_x += icon_size
+
+    # TYPE DE PEAU / CHEVEUX
+    if label.skin_types:
+        c.setFont("NotoSans-Italic", 9)
+        c.drawRightString(x + label_width - 2.5 * mm, y + label_height - 42 * mm, label.skin_types)
+
+    c.setFillColorRGB(0, 0, 0)
+
+    # PRIX + PRIX BARRÉ
+    if label.price_error:
+        c.setFont("Helvetica", 8)
+        c.drawString(x + 2 * mm, y + 3 * mm, label.price_error)
+    elif label.price:
+        if label.compare_price:
+            c.setFont("IbarraRealNova-Regular", 14)
+            text_width = string_width(label.compare_price, "IbarraRealNova-Regular", 10)
+            compare_price_x = x + label_width - 30 * mm - text_width
+            compare_price_y = y + 3 * mm
+            c.setFillColorRGB(0, 0, 0)
+            c.drawString(compare_price_x, compare_price_y, label.compare_price)
+            c.setLineWidth(0.5)
+            c.line(compare_price_x, compare_price_y + 4, compare_price_x + text_width, compare_price_y + 4)
+
+        c.setFont("IbarraRealNova-Bold", 20)
+        if label.compare_price:
+            c.setFillColorRGB(1, 0, 0)
+        else:
+            c.setFillColorRGB(0, 0, 0)
+        c.drawRightString(x + label_width - 2.5 * mm, y + 3 * mm, label.price)
+        c.setFillColorRGB(0, 0, 0)
+        c.drawRightString(x + label_width - 2.5 * mm, y + 3 * mm, label.price)
+        c.setFillColorRGB(0, 0, 0)
+
+
+def render_price_labels(df: pd.DataFrame) -> bytes:
+    """PDF A4 des étiquettes prix, dans l'ordre des lignes de ``df``."""
+    register_fonts(FONTS)
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    icons = DocumentIcons(c)
+    width, height = A4
+
+    for i, label in enumerate(prepare_price_rows(df)):
+        if i > 0 and i % LABELS_PER_PAGE == 0:
+            c.showPage()
+
+        col = i % 2
+        row_pos = (i // 2) % 4
+        x = MARGIN_X + col * LABEL_WIDTH
+        y = height - MARGIN_Y - (row_pos + 1) * LABEL_HEIGHT
+        draw_price_label(c, icons, label, x, y)
+
+    c.save()
+    return buffer.getvalue()
+
+
+def _render_chunk(df: pd.DataFrame) -> bytes:
+    # Exécuté dans un processus de rendu (polices déjà enregistrées par l'initializer)
+    return render_price_labels(df)
+
+
+def render_price_labels_parallel(df: pd.DataFrame, workers: int = None, pages_per_chunk: int = PAGES_PER_CHUNK) -> bytes:
+    """
+    Même PDF que ``render_price_labels`` (mise en page identique, 8 par page), rendu
+    par paquets de ``pages_per_chunk`` pages dans ``workers`` processus.
+    Chaque paquet commence sur une nouvelle page : les positions ne changent pas.
+    """
+    chunk_size = pages_per_chunk * LABELS_PER_PAGE
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(df) < max(PARALLEL_MIN_LABELS, 2 * chunk_size):
+        return render_price_labels(df)
+
+    chunks = [df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=register_fonts, initargs=(FONTS,)) as pool:
+        parts = list(pool.map(_render_chunk, chunks))
+
+    with fitz.open() as merged:
+        for part in parts:
+            with fitz.open(stream=part, filetype="pdf") as chunk_doc:
+                merged.insert_pdf(chunk_doc)
+        return merged.tobytes(garbage=3, deflate=True)
@@ -0,0 +1,92 @@
+"""
+Calcul des prix de vente sur des colonnes entières (NumPy).
+
+Les prix passent en centimes entiers avant tout arrondi : ``3.90`` reste 390
+centimes, alors qu'en flottants ``3.9 - 3`` vaut ``0.8999…`` et l'ancien
+``price_rounding`` donnait 2,90 € au lieu de 3,90 €. Les produits
+(coût × taux, coût × multiplicateur, prix barré × remise) sont arrondis au
+centime le plus proche, demi-centime vers le haut, comme sur une calculette.
+
+Les valeurs manquantes (None, NaN) restent NaN ; une Series en entrée donne une
+Series de même index, un tableau ou une liste donne un ``ndarray``.
+"""
+import numpy as np
+import pandas as pd
+
+ROUNDING_MODES = [".90 (vers le bas)", "0,10 le + proche", ".95 (vers le bas)", "arrondi sup. à 0,05", "aucun"]
+# Modes « vers le bas » -> terminaison en centimes
+ENDINGS = {".90 (vers le bas)": 90, ".95 (vers le bas)": 95}
+
+# Les produits de flottants sont ramenés à 6 décimales avant l'arrondi au centime :
+# 3.35 * 1.5 * 100 = 502.4999… redevient 502.5, donc 5,03 €.
+_SNAP_DECIMALS = 6
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+def _half_up(x: np.ndarray) -> np.ndarray:
+    return np.floor(np.round(x, _SNAP_DECIMALS) + 0.5)
+
+
+def _from_cents(values, valid: np.ndarray, cents: np.ndarray):
+    out = np.full(valid.shape, np.nan)
+    out[valid] = cents / 100
+    if isinstance(values, pd.Series):
+        return pd.Series(out, index=values.index, name=values.name)
+    return out
+
+
+def to_cents(values) -> np.ndarray:
+    """Euros -> centimes (float entiers, NaN conservés) : 12.9 -> 1290."""
+    return _half_up(_as_float(values) * 100)
+
+
+def scale_prices(values, factor: float):
+    """``round(x * factor, 2)`` pour toute la colonne : conversion de devise, multiplicateur."""
+    x = _as_float(values)
+    valid = np.isfinite(x)
+    return _from_cents(values, valid, _half_up(x[valid] * factor * 100))
+
+
+def round_prices(values, mode: str):
+    """
+    Arrondi commercial d'un prix brut :
+
+    * ``.90`` / ``.95 (vers le bas)`` : x,90 (x,95) inférieur ou égal, 0,90 (0,95) au minimum ;
+    * ``0,10 le + proche`` : dizaine de centimes la plus proche (égalité -> pair) ;
+    * ``arrondi sup. à 0,05`` : multiple de 5 centimes supérieur ou égal ;
+    * autre mode (``aucun``) : centime le plus proche.
+    """
+    x = _as_float(values)
+    valid = np.isfinite(x)
+    cents = _half_up(x[valid] * 100).astype(np.int64)
+    if mode in ENDINGS:
+        end = ENDINGS[mode]
+        euros, rest = np.divmod(cents, 100)
+        cents = np.where(rest >= end, euros * 100 + end, np.where(euros > 0, (euros - 1) * 100 + end, end))
+    elif mode == "0,10 le + proche":
+        cents = np.round(cents / 10).astype(np.int64) * 10
+    elif mode == "arrondi sup. à 0,05":
+        cents = -(-cents // 5) * 5
+    return _from_cents(values, valid, cents)
+
+
+def retail_prices(costs, multiplier: float, mode: str):
+    """Coût -> (PV brut, PV conseillé) : ``round(coût * multiplicateur, 2)`` puis ``round_prices``."""
+    brut = scale_prices(costs, multiplier)
+    return brut, round_prices(brut, mode)
+
+
+def sale_prices(compare_prices, discount_percent):
+    """
+    Prix soldé : prix barré moins ``discount_percent`` % (un taux, ou un par prix),
+    arrondi au multiple de 5 centimes supérieur.
+    """
+    x = _as_float(compare_prices)
+    discount = np.broadcast_to(_as_float(discount_percent), x.shape)
+    valid = np.isfinite(x) & np.isfinite(discount)
+    discounted = to_cents(x[valid]) * (100 - discount[valid]) / 100
+    cents = np.ceil(np.round(discounted / 5, _SNAP_DECIMALS)) * 5
+    return _from_cents(compare_prices, valid, cents)
@@ -0,0 +1,92 @@
+"""
+Modèle mémoire compact du catalogue.
+
+La table lue depuis SQLite est entièrement en ``object`` : une chaîne Python par
+cellule, même quand 1 200 lignes répètent « True » ou le même nom de marque.
+``compact_catalog`` la convertit une fois par processus :
+
+* Vendor et Type en catégories (143 marques, 3 types) ;
+* drapeaux ``custom.info_*`` / ``custom.tout_type`` / ``custom.peau_*`` en booléens nullables ;
+* prix et PAO en nombres ;
+* textes longs (descriptions, ingrédients...) dédoublonnés : une seule chaîne
+  par valeur distincte, partagée par toutes les lignes qui la répètent.
+
+Les sessions Streamlit gardent ensuite des vues (copies superficielles, index)
+de ce tableau partagé au lieu de copies complètes.
+"""
+import sys
+
+import pandas as pd
+
+CATEGORY_COLUMNS = ["Vendor", "Type"]
+FLAG_COLUMNS = [
+    "custom.info_bestseller", "custom.info_cruelty_free", "custom.info_vegan", "custom.info_clean_beauty",
+    "custom.tout_type", "custom.peau_grasse", "custom.peau_mature", "custom.peau_seche",
+    "custom.peau_sensible", "custom.peau_acneique",
+]
+NUMERIC_COLUMNS = ["Variant Price", "Variant Compare Price", "custom.periode_mois"]
+
+TRUE_VALUES = {"true", "1"}
+FALSE_VALUES = {"false", "0"}
+
+
+def flag_values(series: pd.Series) -> pd.Series:
+    """'True' / '1' -> True, 'False' / '0' -> False, le reste (vide, NaN) -> <NA>."""
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype("boolean")
+    s = series.astype(str).str.strip().str.lower()
+    out = pd.Series(pd.NA, index=series.index, dtype="boolean")
+    out[s.isin(TRUE_VALUES)] = True
+    out[s.isin(FALSE_VALUES)] = False
+    return out
+
+
+def shared_text(series: pd.Series) -> pd.Series:
+    """Même colonne, mais une seule chaîne Python par valeur distincte (équivalent de sys.intern)."""
+    seen = {}
+    values = [seen.setdefault(v, v) if isinstance(v, str) else v for v in series.astype(object)]
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def compact_catalog(df: pd.DataFrame) -> pd.DataFrame:
+    """Catalogue typé et dédoublonné ; mêmes colonnes, même ordre, mêmes valeurs affichées."""
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORY_COLUMNS:
+            out[col] = values.astype("category")
+        elif col in FLAG_COLUMNS:
+            out[col] = flag_values(values)
+        elif col in NUMERIC_COLUMNS:
+            out[col] = pd.to_numeric(values, errors="coerce")
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            out[col] = shared_text(values)
+        else:
+            out[col] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def _column_bytes(series: pd.Series) -> int:
+    """Mémoire réelle d'une colonne : une chaîne partagée par plusieurs cellules n'est comptée qu'une fois."""
+    if not pd.api.types.is_object_dtype(series):
+        return int(series.memory_usage(index=False, deep=True))
+    unique = {id(v): v for v in series.array if isinstance(v, str)}
+    return int(series.memory_usage(index=False, deep=False)) + sum(sys.getsizeof(v) for v in unique.values())
+
+
+def memory_report(raw: pd.DataFrame, compact: pd.DataFrame) -> pd.DataFrame:
+    """Octets par colonne avant (table SQLite brute) / après (``compact_catalog``), plus une ligne Total."""
+    rows = [
+        {
+            "Colonne": col,
+            "Type": str(compact[col].dtype),
+            "Avant (Ko)": raw[col].memory_usage(index=False, deep=True) / 1024,
+            "Après (Ko)": _column_bytes(compact[col]) / 1024,
+        }
+        for col in compact.columns
+    ]
+    report = pd.DataFrame(rows, columns=["Colonne", "Type", "Avant (Ko)", "Après (Ko)"])
+    total = {"Colonne": "Total", "Type": "", "Avant (Ko)": report["Avant (Ko)"].sum(), "Après (Ko)": report["Après (Ko)"].sum()}
+    report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+    report["Gain"] = 1 - report["Après (Ko)"] / report["Avant (Ko)"]
+    return report.round({"Avant (Ko)": 1, "Après (Ko)": 1, "Gain": 3})
@@ -0,0 +1,106 @@
+"""
+Limiteur « seau percé » (leaky bucket) calé sur les quotas Shopify.
+
+REST : l'en-tête ``X-Shopify-Shop-Api-Call-Limit: 32/40`` donne le niveau du seau
+(vidé de 2 appels/s sur un plan standard).
+GraphQL : ``extensions.cost.throttleStatus`` donne les points disponibles et le
+débit de restauration.
+"""
+import threading
+import time
+from dataclasses import dataclass, replace
+
+
+@dataclass
+class CallStats:
+    """Compteurs cumulés : temps passé à travailler (HTTP) vs à attendre le quota."""
+    calls: int = 0
+    retries: int = 0
+    throttled_seconds: float = 0.0
+    working_seconds: float = 0.0
+
+    def __sub__(self, other: "CallStats") -> "CallStats":
+        return CallStats(
+            calls=self.calls - other.calls,
+            retries=self.retries - other.retries,
+            throttled_seconds=self.throttled_seconds - other.throttled_seconds,
+            working_seconds=self.working_seconds - other.working_seconds,
+        )
+
+    def copy(self) -> "CallStats":
+        return replace(self)
+
+    def summary(self) -> str:
+        return (
+            f"{self.calls} appels Shopify — {self.working_seconds:.1f}s de travail, "
+            f"{self.throttled_seconds:.1f}s en attente de quota ({self.retries} relances)"
+        )
+
+
+class LeakyBucket:
+    """
+    Seau de capacité ``size`` vidé de ``leak_rate`` unités par seconde.
+    ``acquire(cost)`` bloque juste le temps nécessaire pour rester sous la capacité.
+    Partagé entre threads.
+    """
+
+    def __init__(self, size: float, leak_rate: float):
+        self.size = float(size)
+        self.leak_rate = float(leak_rate)
+        self.level = 0.0
+        self.blocked_until = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _leak(self, now: float):
+        self.level = max(0.0, self.level - (now - self._stamp) * self.leak_rate)
+        self._stamp = now
+
+    def acquire(self, cost: float = 1.0) -> float:
+        """Réserve ``cost`` unités ; renvoie le temps d'attente (s)."""
+        cost = min(float(cost), self.size)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._leak(now)
+                delay = max(0.0, self.blocked_until - now)
+                if delay == 0.0:
+                    overflow = self.level + cost - self.size
+                    if overflow <= 0:
+                        self.level += cost
+                        return waited
+                    delay = overflow / self.leak_rate
+            time.sleep(delay)
+            waited += delay
+
+    def update(self, level: float, size: float = None, leak_rate: float = None):
+        """Recale le seau sur l'état annoncé par Shopify."""
+        with self._lock:
+            self._leak(time.monotonic())
+            if size:
+                self.size = float(size)
+            if leak_rate:
+                self.leak_rate = float(leak_rate)
+            self.level = min(float(level), self.size)
+
+    def pause(self, seconds: float):
+        """Bloque le seau pendant ``seconds`` (réponse 429 + Retry-After)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def parse_call_limit(header: str):
+    """'32/40' -> (32, 40) ; None si l'en-tête est absent ou illisible."""
+    try:
+        used, size = str(header).split("/")
+        return float(used), float(size)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(resp, default: float = 2.0) -> float:
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,182 @@
+"""
+Cache disque des étiquettes rendues, adressé par contenu.
+
+La clé d'un fragment est l'empreinte des champs que lit la mise en page plus sa
+version (``row_key``) : un produit inchangé n'est jamais re-rendu, un produit
+modifié ou une nouvelle version de mise en page donne une nouvelle clé.
+Taille bornée : au-delà de ``max_bytes``, les fragments les moins récemment
+utilisés sont supprimés (date de modification rafraîchie à chaque lecture).
+"""
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from .assets import asset_path
+
+CACHE_DIR = asset_path("data", "render_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def row_key(row, fields, version) -> str:
+    """Empreinte des champs lus par une mise en page (NaN et None valent '')."""
+    values = [version] + ["" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v)
+                          for v in (row.get(f) for f in fields)]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode()).hexdigest()
+
+
+def row_keys(df: pd.DataFrame, fields, version) -> list:
+    """``row_key`` de chaque ligne, en lisant seulement les colonnes ``fields``."""
+    return [row_key(row, fields, version) for row in df.reindex(columns=fields).to_dict("records")]
+
+
+class RenderCache:
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size = None  # calculée au premier écrit
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # marque l'usage (LRU)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.path.getsize(path)  # fragment réécrit : sa taille ne compte qu'une fois
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)
+        with self._lock:
+            self.writes += 1
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._entries())
+            else:
+                self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def get_or_render(self, key: str, render) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def _entries(self):
+        """(mtime, chemin, taille) de chaque fragment."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, path, st.st_size))
+        return entries
+
+    def _evict(self):
+        # Redescend à 90 % de la limite pour ne pas évincer à chaque écriture
+        entries = sorted(self._entries())
+        size = sum(e[2] for e in entries)
+        target = self.max_bytes * 0.9
+        for _, path, entry_size in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "evictions": self.evictions}
+
+    def summary(self) -> str:
+        s = self.stats()
+        total = s["hits"] + s["misses"]
+        rate = s["hits"] / total * 100 if total else 0
+        return (f"Cache de rendu : {s['hits']} réutilisé(s), {s['misses']} rendu(s) "
+                f"({rate:.0f} % de réussite), {s['evictions']} évincé(s)")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """Cache partagé par tout le processus."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache()
+        return _cache
+
+
+def render_pages_cached(df: pd.DataFrame, keys, render_batch, cache: RenderCache = None) -> bytes:
+    """
+    PDF d'une page par ligne de ``df`` assemblé depuis le cache. Les lignes absentes
+    du cache sont rendues ensemble par ``render_batch(df_manquants)`` (une page par
+    ligne), puis découpées page par page et mises en cache.
+    """
+    import fitz  # PyMuPDF
+
+    cache = cache or get_render_cache()
+    keys = list(keys)
+    fragments = {}
+    missing = []
+    for pos, key in enumerate(keys):
+        if key in fragments:
+            continue
+        data = cache.get(key)
+        if data is None:
+            missing.append(pos)
+            fragments[key] = None
+        else:
+            fragments[key] = data
+
+    if missing:
+        with fitz.open(stream=render_batch(df.iloc[missing]), filetype="pdf") as batch:
+            for page_no, pos in enumerate(missing):
+                with fitz.open() as single:
+                    single.insert_pdf(batch, from_page=page_no, to_page=page_no)
+                    data = single.tobytes(garbage=3, deflate=True)
+                cache.put(keys[pos], data)
+                fragments[keys[pos]] = data
+
+    with fitz.open() as out:
+        for key in keys:
+            with fitz.open(stream=fragments[key], filetype="pdf") as page:
+                out.insert_pdf(page)
+        # garbage=4 fusionne les objets identiques (icônes répétées d'un fragment à l'autre)
+        return out.tobytes(garbage=4, deflate=True)
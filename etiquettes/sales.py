@@ -0,0 +1,268 @@
+"""
+Soldes automatiques (onglet 7) : tag ``soldesNN`` -> prix barré, en lots GraphQL.
+
+Les prix cibles de toutes les variantes taguées sont calculés en une passe
+vectorisée sur la table ``variants`` locale (prix, prix barré, tags), sans relire
+le catalogue Shopify. Chaque produit à modifier part ensuite en un seul appel
+``productVariantsBulkUpdate`` (toutes ses variantes) ; à l'annulation, le même
+appel retire aussi le tag (``tagsRemove``). Les appels tournent en parallèle
+sous le quota GraphQL du client partagé, puis la table locale est mise à jour.
+
+L'écriture se fait en deux temps : ``get_plan`` calcule, sans appel API, le
+tableau des écarts (prix actuel, prix barré, prix cible, action) et le garde en
+cache tant que la base locale ne change pas ; ``apply_plan`` n'envoie ensuite que
+les lignes à modifier. Relancer après un succès ne renvoie donc rien.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from . import store
+from .barcode_index import fetch_variants_into_store
+from .pricing import sale_prices
+from .shopify_client import ShopifyError
+
+DEFAULT_CONCURRENCY = 4
+
+# Premier tag « soldesNN » de la liste « tag1, soldes30, tag2 »
+SALE_TAG = r"(?i)(?:^|,)\s*(?P<tag>soldes(?P<discount>\d+))\s*(?=,|$)"
+
+APPLY_MUTATION = """
+mutation sale($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
+  productVariantsBulkUpdate(productId: $productId, variants: $variants) {
+    productVariants { id }
+    userErrors { field message }
+  }
+}
+"""
+
+REVERT_MUTATION = """
+mutation endSale($productId: ID!, $variants: [ProductVariantsBulkInput!]!, $tags: [String!]!) {
+  productVariantsBulkUpdate(productId: $productId, variants: $variants) {
+    productVariants { id }
+    userErrors { field message }
+  }
+  tagsRemove(id: $productId, tags: $tags) {
+    userErrors { field message }
+  }
+}
+"""
+
+PLAN_COLUMNS = [
+    "product_id", "variant_id", "title", "tag", "discount", "price", "compare_at_price", "target", "changed", "action",
+]
+# Libellés du tableau d'aperçu (onglet 7)
+DIFF_COLUMNS = {
+    "title": "Produit", "variant_id": "Variante", "tag": "Tag", "discount": "Remise %", "price": "Prix actuel",
+    "compare_at_price": "Prix barré", "target": "Prix cible", "action": "Action",
+}
+SALE, REVERT = "soldes", "annulation"
+NO_CHANGE = "aucune (déjà à jour)"
+MAX_PLANS = 4
+
+
+def load_sale_variants(client=None, db_path: str = store.DB_PATH) -> pd.DataFrame:
+    """
+    Variantes locales avec leurs tags. Une table encore vide, ou dont des lignes datent
+    d'avant l'ajout des tags (NULL, alors qu'un produit sans tag vaut ''), est relue
+    en entier depuis Shopify (lecture paginée légère) : une synchro incrémentale ou un
+    tag posé à la main ne réécrivent que quelques produits et laisseraient les autres
+    hors du plan.
+    """
+    variants = store.load_variants(db_path)
+    if client is not None and (variants.empty or variants["tags"].isna().any()):
+        fetch_variants_into_store(client, db_path)
+        variants = store.load_variants(db_path)
+    return variants
+
+
+def sale_tags(tags: pd.Series) -> pd.DataFrame:
+    """Colonnes ``tag`` ('soldes30') et ``discount`` (30.0) ; NaN sans tag de soldes."""
+    found = tags.astype(object).where(tags.notna(), "").astype(str).str.extract(SALE_TAG)
+    return pd.DataFrame({"tag": found["tag"], "discount": pd.to_numeric(found["discount"])}, index=tags.index)
+
+
+def _prices(values: pd.Series) -> np.ndarray:
+    # '' et '0.00' comptent comme « pas de prix barré », comme l'ancien test ``if compare_at``
+    return pd.to_numeric(values.astype(object).replace({"": None}), errors="coerce").to_numpy(dtype=float)
+
+
+def _frame(variants: pd.DataFrame, tags: pd.DataFrame, price, compare, target, changed, action: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "product_id": variants["product_id"].to_numpy(),
+        "variant_id": variants["variant_id"].to_numpy(),
+        "title": variants["title"].to_numpy(),
+        "tag": tags["tag"].to_numpy(),
+        "discount": tags["discount"].to_numpy(),
+        "price": price,
+        "compare_at_price": compare,
+        "target": target,
+        "changed": changed,
+        "action": np.where(changed, action, NO_CHANGE),
+    }, columns=PLAN_COLUMNS)
+
+
+def sale_plan(variants: pd.DataFrame) -> pd.DataFrame:
+    """
+    Variantes des produits tagués ``soldesNN`` : prix actuel, prix barré (ou prix actuel
+    s'il n'y en a pas), prix soldé cible et ``changed`` (écriture nécessaire).
+    """
+    tags = sale_tags(variants["tags"])
+    on_sale = tags["discount"].notna().to_numpy()
+    variants, tags = variants[on_sale], tags[on_sale]
+    price = _prices(variants["price"])
+    compare_at = _prices(variants["compare_at_price"])
+    has_compare = np.nan_to_num(compare_at) > 0
+    compare = np.where(has_compare, compare_at, price)
+    target = np.asarray(sale_prices(compare, tags["discount"].to_numpy()))
+    changed = ~has_compare | (np.abs(compare - price) < 0.01) | (np.abs(price - target) > 0.01)
+    return _frame(variants, tags, price, compare, target, changed & np.isfinite(target), "solder")
+
+
+def revert_plan(variants: pd.DataFrame) -> pd.DataFrame:
+    """Variantes des produits tagués ``soldesNN`` : retour au prix barré là où il y en a un."""
+    tags = sale_tags(variants["tags"])
+    on_sale = tags["discount"].notna().to_numpy()
+    variants, tags = variants[on_sale], tags[on_sale]
+    price = _prices(variants["price"])
+    compare_at = _prices(variants["compare_at_price"])
+    has_compare = np.nan_to_num(compare_at) > 0
+    return _frame(variants, tags, price, np.where(has_compare, compare_at, np.nan),
+                  np.where(has_compare, compare_at, price), has_compare, "restaurer le prix barré")
+
+
+def _gid(kind: str, value) -> str:
+    return f"gid://shopify/{kind}/{int(value)}"
+
+
+def _user_errors(data: dict) -> str:
+    errors = [e for result in data.values() for e in ((result or {}).get("userErrors") or [])]
+    return "; ".join(e.get("message", "") for e in errors)
+
+
+def _push_product(client, product_id, rows: pd.DataFrame, revert: bool) -> str:
+    """Un appel pour toutes les variantes d'un produit ; renvoie le motif d'échec ('' si tout est passé)."""
+    variants = [
+        {
+            "id": _gid("ProductVariant", r.variant_id),
+            "price": f"{r.target:.2f}",
+            "compareAtPrice": None if revert else f"{r.compare_at_price:.2f}",
+        }
+        for r in rows.itertuples(index=False)
+    ]
+    variables = {"productId": _gid("Product", product_id), "variants": variants}
+    if revert:
+        variables["tags"] = sorted(set(rows["tag"]))
+    try:
+        data = client.graphql(REVERT_MUTATION if revert else APPLY_MUTATION, variables)
+    except ShopifyError as e:
+        return str(e)
+    return _user_errors(data)
+
+
+def push_plan(client, plan: pd.DataFrame, revert: bool = False, concurrency: int = DEFAULT_CONCURRENCY,
+              on_progress=None) -> pd.DataFrame:
+    """
+    Envoie les lignes ``changed`` du plan, un appel par produit, ``concurrency`` en parallèle.
+    ``on_progress(fait, total, produits_par_s)`` est appelé depuis le thread appelant.
+    Renvoie le plan avec ``applied`` (bool) et ``error`` (motif) par variante.
+    """
+    report = plan.assign(applied=False, error="")
+    pending = report[report["changed"]]
+    groups = list(pending.groupby("product_id", sort=False))
+    total, start = len(groups), time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        futures = {pool.submit(_push_product, client, pid, rows, revert): rows.index for pid, rows in groups}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                error = future.result()
+            except Exception as e:
+                error = str(e)
+            report.loc[index, "applied"] = not error
+            report.loc[index, "error"] = error
+            if on_progress:
+                elapsed = time.monotonic() - start
+                on_progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+    return report
+
+
+def record_pushed(variants: pd.DataFrame, report: pd.DataFrame, revert: bool = False, db_path: str = store.DB_PATH):
+    """Reporte dans la table locale les prix (et, à l'annulation, les tags) des produits passés."""
+    done = report[report["applied"]]
+    if done.empty:
+        return
+    products = set(done["product_id"])
+    rows = variants[variants["product_id"].isin(products)].copy()
+    pushed = done.set_index("variant_id")
+    hit = rows["variant_id"].isin(pushed.index)
+    ids = rows.loc[hit, "variant_id"]
+    rows.loc[hit, "price"] = pushed.loc[ids, "target"].map("{:.2f}".format).to_numpy()
+    if revert:
+        rows.loc[hit, "compare_at_price"] = None
+        removed = done.groupby("product_id")["tag"].first()
+        rows["tags"] = [
+            ", ".join(t.strip() for t in str(tags).split(",") if t.strip() and t.strip().lower() != removed[pid].lower())
+            if pid in removed.index else tags
+            for pid, tags in zip(rows["product_id"], rows["tags"])
+        ]
+    else:
+        rows.loc[hit, "compare_at_price"] = pushed.loc[ids, "compare_at_price"].map("{:.2f}".format).to_numpy()
+    store.apply_variant_changes(rows.to_dict("records"), product_ids=products, db_path=db_path)
+
+
+@dataclass
+class SalePlan:
+    kind: str                  # SALE ou REVERT
+    variants: pd.DataFrame     # table ``variants`` locale au moment du calcul
+    table: pd.DataFrame        # une ligne par variante taguée (PLAN_COLUMNS)
+
+    @property
+    def revert(self) -> bool:
+        return self.kind == REVERT
+
+    @property
+    def pending(self) -> pd.DataFrame:
+        return self.table[self.table["changed"]]
+
+    def diff(self) -> pd.DataFrame:
+        """Tableau d'aperçu : lignes à modifier d'abord, colonnes en clair."""
+        order = self.table.sort_values(["changed", "title"], ascending=[False, True], kind="stable")
+        return order[list(DIFF_COLUMNS)].rename(columns=DIFF_COLUMNS)
+
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def get_plan(kind: str, client=None, db_path: str = store.DB_PATH) -> SalePlan:
+    """
+    Plan SALE ou REVERT de la table ``variants`` locale, partagé tant que la base ne
+    change pas (``store.file_version``). Aucun appel API, sauf le remplissage unique
+    d'une table sans tags (voir ``load_sale_variants``).
+    """
+    key = (kind, db_path, store.file_version(db_path))
+    with _plans_lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+    variants = load_sale_variants(client, db_path)
+    plan = SalePlan(kind, variants, (revert_plan if kind == REVERT else sale_plan)(variants))
+    with _plans_lock:
+        _plans[(kind, db_path, store.file_version(db_path))] = plan
+        while len(_plans) > MAX_PLANS:
+            _plans.popitem(last=False)
+    return plan
+
+
+def apply_plan(client, plan: SalePlan, concurrency: int = DEFAULT_CONCURRENCY, on_progress=None,
+               db_path: str = store.DB_PATH) -> pd.DataFrame:
+    """Envoie les seules lignes à modifier du plan puis met la base locale à jour ; renvoie le rapport."""
+    report = push_plan(client, plan.table, revert=plan.revert, concurrency=concurrency, on_progress=on_progress)
+    record_pushed(plan.variants, report, revert=plan.revert, db_path=db_path)
+    return report
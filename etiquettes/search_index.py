@@ -0,0 +1,145 @@
+"""
+Recherche de produits côté serveur pour les listes de sélection.
+
+Index de trigrammes sur marque, titre, code-barres et contenance (texte sans
+accents, en minuscules), plus les débuts de mots d'une ou deux lettres.
+Une requête intersecte quelques ensembles puis vérifie les candidats : les
+``k`` meilleurs résultats sortent en bien moins d'une milliseconde sur
+1 200 produits, au lieu d'envoyer toute la liste des libellés au navigateur.
+
+Les résultats sont des ID produit Shopify (colonne ``ID``), stables d'une
+version du catalogue à l'autre. L'index est construit une fois par version
+(``df.attrs`` posé par ``store.load_catalog``) et partagé par tous les onglets
+et sessions.
+"""
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import pandas as pd
+
+from .prepare import product_labels, text_column
+
+SEARCH_FIELDS = ["Vendor", "Title", "Variant Barcode", "custom.taille"]
+DEFAULT_LIMIT = 50
+MAX_VERSIONS = 2
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(value: str) -> str:
+    """'Crème Hydratante 50ml' -> 'creme hydratante 50ml'."""
+    value = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", value.lower()).strip()
+
+
+def _trigrams(token: str):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class ProductSearchIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.labels = product_labels(df).tolist()
+        self.ids = df["ID"].tolist()
+        self._position = {product_id: pos for pos, product_id in enumerate(self.ids)}
+        self._newest = sorted(range(len(self.ids)), key=lambda pos: -self.ids[pos])
+
+        fields = [text_column(df[f]) if f in df.columns else pd.Series("", index=df.index) for f in SEARCH_FIELDS]
+        names = (fields[0] + " " + fields[1]).map(normalize).tolist()
+        others = (fields[2] + " " + fields[3]).map(normalize).tolist()
+        self._barcodes = fields[2].tolist()
+        self._names = [f" {n} " for n in names]          # marque + titre, bornés par des espaces
+        self._texts = [f" {n} {o} " for n, o in zip(names, others)]
+
+        self._grams = {}
+        self._prefixes = {}
+        for pos, text in enumerate(self._texts):
+            for word in text.split():
+                for size in (1, 2):
+                    self._prefixes.setdefault(word[:size], set()).add(pos)
+                for gram in _trigrams(word):
+                    self._grams.setdefault(gram, set()).add(pos)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, product_id):
+        return product_id in self._position
+
+    def label(self, product_id) -> str:
+        """Libellé « Vendor - Title (taille) » d'un produit."""
+        return self.labels[self._position[product_id]]
+
+    def _candidates(self, token: str) -> set:
+        if len(token) < 3:
+            return self._prefixes.get(token, set())
+        sets = sorted((self._grams.get(g, set()) for g in _trigrams(token)), key=len)
+        return set.intersection(*sets) if sets else set()
+
+    def _score(self, pos: int, tokens, raw_query: str) -> float:
+        if raw_query == self._barcodes[pos]:
+            return 100
+        name, text = self._names[pos], self._texts[pos]
+        score = 0
+        for token in tokens:
+            if f" {token}" in name:
+                score += 2      # début d'un mot de la marque ou du titre
+            elif f" {token}" in text:
+                score += 1      # début du code-barres ou de la contenance
+            elif token in name:
+                score += 0.5
+        return score
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, within=None) -> list:
+        """
+        ID des ``limit`` meilleurs produits pour ``query``. Tous les mots doivent
+        apparaître ; un mot en début de marque ou de titre compte plus, un code-barres
+        exact passe en tête ; à égalité, les plus récents d'abord.
+        Requête vide : les plus récents. ``within`` (ID) limite la recherche.
+        """
+        tokens = normalize(query).split()
+        allowed = None if within is None else {self._position[i] for i in within if i in self._position}
+        if not tokens:
+            ranked = (pos for pos in self._newest if allowed is None or pos in allowed)
+            return [self.ids[pos] for _, pos in zip(range(limit), ranked)]
+
+        candidates = None
+        for token in sorted(tokens, key=len, reverse=True):
+            found = self._candidates(token)
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return []
+        if allowed is not None:
+            candidates = candidates & allowed
+
+        raw_query = str(query).strip()
+        scored = []
+        for pos in candidates:
+            if all(token in self._texts[pos] for token in tokens):
+                scored.append((self._score(pos, tokens, raw_query), self.ids[pos]))
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [product_id for _, product_id in scored[:limit]]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(df: pd.DataFrame) -> ProductSearchIndex:
+    """
+    Index du catalogue complet ``df`` (pour un sous-ensemble, passer ``within`` à
+    ``search``), partagé pour une même version (``df.attrs["catalog_version"]``) ;
+    sans version, construit à chaque appel.
+    """
+    version = df.attrs.get("catalog_version")
+    if version is None:
+        return ProductSearchIndex(df)
+    with _indexes_lock:
+        index = _indexes.get(version)
+        if index is None:
+            index = _indexes[version] = ProductSearchIndex(df)
+            while len(_indexes) > MAX_VERSIONS:
+                _indexes.popitem(last=False)
+        _indexes.move_to_end(version)
+        return index
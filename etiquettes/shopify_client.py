@@ -0,0 +1,169 @@
+"""
+Client HTTP pour l'API Admin Shopify (REST + GraphQL).
+
+Un seul client est partagé par tous les appels : il va au débit maximal permis
+par le quota (seaux percés REST et GraphQL), respecte ``Retry-After`` sur les
+429 et cumule le temps passé à travailler vs à attendre (``stats``).
+"""
+import re
+import threading
+import time
+
+import requests
+
+from .rate_limit import CallStats, LeakyBucket, parse_call_limit, retry_after_seconds
+
+API_VERSION = "2024-01"
+
+# Quotas d'un plan standard ; recalés automatiquement à chaque réponse.
+REST_BUCKET_SIZE = 40
+REST_LEAK_RATE = 2.0
+GRAPHQL_BUCKET_SIZE = 1000
+GRAPHQL_RESTORE_RATE = 50.0
+GRAPHQL_DEFAULT_COST = 50
+MAX_RETRIES = 5
+
+
+class ShopifyError(RuntimeError):
+    """Erreur renvoyée par Shopify (HTTP, GraphQL ``errors`` ou ``userErrors``)."""
+
+
+def admin_base_url(shop_url: str, api_version: str = API_VERSION) -> str:
+    """
+    'ma-boutique.myshopify.com' -> 'https://ma-boutique.myshopify.com/admin/api/<version>'.
+    Une URL complète ('http://127.0.0.1:8000') est conservée telle quelle,
+    ce qui permet de viser un faux serveur Shopify local.
+    """
+    base = str(shop_url).strip().rstrip("/")
+    if not base.startswith(("http://", "https://")):
+        base = f"https://{base}"
+    return f"{base}/admin/api/{api_version}"
+
+
+def next_page_url(resp) -> str:
+    """URL ``rel="next"`` de l'en-tête Link (pagination REST), sinon None."""
+    link = resp.headers.get("Link", "")
+    match = re.search(r'<([^>]+)>;\s*rel="next"', link)
+    return match.group(1) if match else None
+
+
+class ShopifyClient:
+    def __init__(self, shop_url: str, access_token: str, api_version: str = API_VERSION, session=None):
+        self.shop_url = shop_url
+        self.api_version = api_version
+        self.base_url = admin_base_url(shop_url, api_version)
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "X-Shopify-Access-Token": access_token,
+            "Content-Type": "application/json",
+        })
+        self.rest_bucket = LeakyBucket(REST_BUCKET_SIZE, REST_LEAK_RATE)
+        self.graphql_bucket = LeakyBucket(GRAPHQL_BUCKET_SIZE, GRAPHQL_RESTORE_RATE)
+        self.stats = CallStats()
+        self._stats_lock = threading.Lock()
+        self._query_costs = {}
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def stats_snapshot(self) -> CallStats:
+        with self._stats_lock:
+            return self.stats.copy()
+
+    def _record(self, waited: float = 0.0, worked: float = 0.0, calls: int = 0, retries: int = 0):
+        with self._stats_lock:
+            self.stats.throttled_seconds += waited
+            self.stats.working_seconds += worked
+            self.stats.calls += calls
+            self.stats.retries += retries
+
+    def _send(self, bucket, cost, method, url, **kwargs):
+        waited = bucket.acquire(cost)
+        start = time.monotonic()
+        resp = self.session.request(method, url, **kwargs)
+        self._record(waited=waited, worked=time.monotonic() - start, calls=1)
+        return resp
+
+    def _backoff(self, bucket, resp):
+        delay = retry_after_seconds(resp)
+        bucket.pause(delay)
+        self._record(retries=1)
+
+    # --- REST -----------------------------------------------------------------
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        url = self.url(path)
+        for attempt in range(MAX_RETRIES + 1):
+            resp = self._send(self.rest_bucket, 1, method, url, **kwargs)
+            limit = parse_call_limit(resp.headers.get("X-Shopify-Shop-Api-Call-Limit"))
+            if limit:
+                self.rest_bucket.update(*limit)
+            if resp.status_code == 429 and attempt < MAX_RETRIES:
+                self._backoff(self.rest_bucket, resp)
+                continue
+            return resp
+        return resp
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def paginate(self, path: str, params: dict = None):
+        """Parcourt une liste REST page par page (en-tête Link) ; renvoie chaque réponse JSON."""
+        url, page_params = self.url(path), params
+        while url:
+            resp = self.get(url, params=page_params)
+            resp.raise_for_status()
+            yield resp.json()
+            url, page_params = next_page_url(resp), None
+
+    # --- GraphQL --------------------------------------------------------------
+    def graphql(self, query: str, variables: dict = None) -> dict:
+        """Exécute une requête GraphQL et renvoie ``data`` (lève ShopifyError sinon)."""
+        url = self.url("graphql.json")
+        body = {"query": query, "variables": variables or {}}
+        for attempt in range(MAX_RETRIES + 1):
+            cost = self._query_costs.get(query, GRAPHQL_DEFAULT_COST)
+            resp = self._send(self.graphql_bucket, cost, "POST", url, json=body)
+            if resp.status_code == 429 and attempt < MAX_RETRIES:
+                self._backoff(self.graphql_bucket, resp)
+                continue
+            if not resp.ok:
+                raise ShopifyError(f"GraphQL HTTP {resp.status_code} : {resp.text[:300]}")
+            payload = resp.json()
+            cost_info = (payload.get("extensions") or {}).get("cost") or {}
+            self._update_graphql_bucket(query, cost_info)
+            errors = payload.get("errors") or []
+            throttled = any((e.get("extensions") or {}).get("code") == "THROTTLED" for e in errors)
+            if throttled and attempt < MAX_RETRIES:
+                self._record(retries=1)
+                continue
+            if errors:
+                raise ShopifyError(f"GraphQL : {errors}")
+            return payload.get("data") or {}
+        raise ShopifyError("GraphQL : quota Shopify toujours dépassé après plusieurs tentatives.")
+
+    def _update_graphql_bucket(self, query: str, cost_info: dict):
+        if cost_info.get("requestedQueryCost") is not None:
+            self._query_costs[query] = cost_info["requestedQueryCost"]
+        status = cost_info.get("throttleStatus")
+        if status:
+            maximum = status.get("maximumAvailable") or GRAPHQL_BUCKET_SIZE
+            self.graphql_bucket.update(
+                maximum - status.get("currentlyAvailable", maximum),
+                size=maximum,
+                leak_rate=status.get("restoreRate"),
+            )
+
+
+def gid_to_id(gid) -> int:
+    """'gid://shopify/Product/123' -> 123."""
+    if gid is None:
+        return None
+    return int(str(gid).rsplit("/", 1)[-1])
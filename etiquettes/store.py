@@ -0,0 +1,356 @@
+"""
+Stockage de la base produits dans SQLite (``data/produits_shopify.sqlite``).
+
+La table ``products`` remplace la relecture de ``produits_shopify.csv`` à chaque
+rerun Streamlit : elle est lue une seule fois par processus (cache indexé sur
+la date de modification du fichier) et une petite table ``meta`` garde la date
+de dernière mise à jour et le nombre de produits pour l'affichage du bandeau.
+"""
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .catalog import CSV_PATH, VARIANT_COLUMNS
+from .product_model import compact_catalog, memory_report
+
+DB_PATH = "data/produits_shopify.sqlite"
+
+_cache = {}
+_reports = {}
+_cache_lock = threading.Lock()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return sqlite3.connect(db_path)
+
+
+def _file_key(db_path: str):
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def file_version(db_path: str = DB_PATH):
+    """(date de modification, taille) du fichier SQLite : change à chaque écriture ; None sans base."""
+    return _file_key(db_path)
+
+
+def _to_sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Colonnes numériques conservées, le reste en texte (True -> 'True', comme le CSV relu)."""
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            out[col] = values
+        else:
+            out[col] = values.map(lambda v: None if pd.isna(v) else str(v)).astype(object)
+    if "ID" in out.columns:
+        out["ID"] = pd.to_numeric(out["ID"], errors="coerce").astype("Int64")
+        out = out[out["ID"].notna()].drop_duplicates(subset="ID", keep="last")
+    return out
+
+
+def _from_sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # NULL -> NaN, comme un CSV relu par pandas
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(object).where(df[col].notna(), np.nan)
+    return df
+
+
+def compute_meta(df: pd.DataFrame) -> dict:
+    meta = {"row_count": str(len(df)), "max_updated_at": ""}
+    if "updated_at" in df.columns and len(df):
+        max_updated = pd.to_datetime(df["updated_at"], errors="coerce", utc=True).max()
+        if pd.notna(max_updated):
+            meta["max_updated_at"] = max_updated.isoformat()
+    return meta
+
+
+def _write_meta(con: sqlite3.Connection, meta: dict):
+    con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(meta.items()))
+
+
+def save_catalog(df: pd.DataFrame, db_path: str = DB_PATH):
+    """Remplace la table ``products`` et met à jour les métadonnées."""
+    frame = _to_sql_frame(df)
+    with _connect(db_path) as con:
+        frame.to_sql("products", con, if_exists="replace", index=False)
+        if "ID" in frame.columns:
+            con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_id ON products (ID)")
+        _write_meta(con, compute_meta(frame))
+    con.close()
+    invalidate(db_path)
+
+
+def _table_columns(con: sqlite3.Connection, table: str) -> list:
+    return [row[1] for row in con.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _sql_value(v):
+    if pd.isna(v):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _merge_meta(con: sqlite3.Connection, updated_max=None, watermark=None):
+    meta = dict(con.execute("SELECT key, value FROM meta").fetchall())
+    meta["row_count"] = str(con.execute("SELECT COUNT(*) FROM products").fetchone()[0])
+    if updated_max is not None and (last_updated(meta) is None or updated_max > last_updated(meta)):
+        meta["max_updated_at"] = updated_max.isoformat()
+    if watermark is not None:
+        meta["watermark"] = watermark.isoformat()
+    _write_meta(con, meta)
+
+
+def apply_changes(changed: pd.DataFrame, removed_ids=(), watermark=None, db_path: str = DB_PATH) -> dict:
+    """
+    Mise à jour incrémentale : upsert des lignes ``changed`` (par ID) et suppression
+    de ``removed_ids``, sans réécrire la table. Les colonnes absentes de ``changed``
+    gardent leur valeur. Renvoie {"upserted": n, "removed": n}.
+    """
+    if not os.path.exists(db_path):
+        save_catalog(changed, db_path)
+        if watermark is not None:
+            with _connect(db_path) as con:
+                _merge_meta(con, watermark=watermark)
+            con.close()
+        return {"upserted": len(changed), "removed": 0}
+
+    frame = _to_sql_frame(changed) if len(changed) else changed
+    removed_ids = [int(i) for i in removed_ids]
+    with _connect(db_path) as con:
+        columns = _table_columns(con, "products")
+        for col in frame.columns:
+            if col not in columns:
+                con.execute(f'ALTER TABLE products ADD COLUMN "{col}"')
+        if len(frame):
+            cols = list(frame.columns)
+            names = ", ".join(f'"{c}"' for c in cols)
+            updates = ", ".join(f'"{c}" = excluded."{c}"' for c in cols if c != "ID")
+            sql = (
+                f'INSERT INTO products ({names}) VALUES ({", ".join("?" for _ in cols)}) '
+                f'ON CONFLICT (ID) DO UPDATE SET {updates}'
+            )
+            rows = [tuple(_sql_value(v) for v in r) for r in frame.itertuples(index=False, name=None)]
+            con.executemany(sql, rows)
+        if removed_ids:
+            con.executemany("DELETE FROM products WHERE ID = ?", [(i,) for i in removed_ids])
+        updated_max = pd.to_datetime(frame["updated_at"], errors="coerce", utc=True).max() if len(frame) else None
+        _merge_meta(con, updated_max=updated_max if pd.notna(updated_max) else None, watermark=watermark)
+    con.close()
+    invalidate(db_path)
+    return {"upserted": len(frame), "removed": len(removed_ids)}
+
+
+def product_ids(db_path: str = DB_PATH) -> set:
+    if not os.path.exists(db_path):
+        return set()
+    con = sqlite3.connect(db_path)
+    try:
+        return {int(row[0]) for row in con.execute("SELECT ID FROM products") if row[0] is not None}
+    finally:
+        con.close()
+
+
+VARIANTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS variants (
+    variant_id INTEGER PRIMARY KEY,
+    product_id INTEGER,
+    barcode TEXT,
+    inventory_item_id INTEGER,
+    title TEXT,
+    variant_title TEXT,
+    price TEXT,
+    compare_at_price TEXT,
+    tags TEXT
+)
+"""
+
+
+def _variants_table(con: sqlite3.Connection):
+    """Crée la table ``variants`` ou lui ajoute les colonnes apparues depuis (``tags``)."""
+    con.execute(VARIANTS_SCHEMA)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_variants_barcode ON variants (barcode)")
+    columns = _table_columns(con, "variants")
+    for col in VARIANT_COLUMNS:
+        if col not in columns:
+            con.execute(f'ALTER TABLE variants ADD COLUMN "{col}" TEXT')
+
+
+def apply_variant_changes(rows, product_ids=(), replace_all: bool = False, db_path: str = DB_PATH):
+    """
+    Remplace les variantes des produits ``product_ids`` (modifiés ou retirés) par ``rows``.
+    ``replace_all`` vide d'abord la table (synchro complète). Une mise à jour partielle
+    d'une table encore vide est ignorée : l'index barcode la remplira en entier.
+    """
+    with _connect(db_path) as con:
+        _variants_table(con)
+        if not replace_all and con.execute("SELECT COUNT(*) FROM variants").fetchone()[0] == 0:
+            rows = []
+        elif replace_all:
+            con.execute("DELETE FROM variants")
+        else:
+            con.executemany("DELETE FROM variants WHERE product_id = ?", [(int(i),) for i in product_ids])
+        names = ", ".join(VARIANT_COLUMNS)
+        con.executemany(
+            f"INSERT OR REPLACE INTO variants ({names}) VALUES ({', '.join('?' for _ in VARIANT_COLUMNS)})",
+            [tuple(_sql_value(r.get(c)) for c in VARIANT_COLUMNS) for r in rows],
+        )
+    con.close()
+
+
+def set_product_tags(tags_by_product: dict, db_path: str = DB_PATH):
+    """Met à jour les tags connus localement ({product_id: 'tag1, tag2'}) après une écriture Shopify."""
+    if not tags_by_product or not os.path.exists(db_path):
+        return
+    with _connect(db_path) as con:
+        _variants_table(con)
+        con.executemany(
+            "UPDATE variants SET tags = ? WHERE product_id = ?",
+            [(tags, int(product_id)) for product_id, tags in tags_by_product.items()],
+        )
+    con.close()
+
+
+def load_variants(db_path: str = DB_PATH) -> pd.DataFrame:
+    """
+    Table ``variants`` (vide si aucune synchro ne l'a encore remplie). Une colonne
+    ajoutée depuis la dernière synchro (``tags``) revient vide.
+    """
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=VARIANT_COLUMNS)
+    con = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql("SELECT * FROM variants", con).reindex(columns=VARIANT_COLUMNS)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return pd.DataFrame(columns=VARIANT_COLUMNS)
+    finally:
+        con.close()
+
+
+def journal_entries(keys, db_path: str = DB_PATH) -> set:
+    """Clés déjà présentes dans le journal des ajustements de stock."""
+    keys = list(keys)
+    if not keys or not os.path.exists(db_path):
+        return set()
+    with _connect(db_path) as con:
+        con.execute("CREATE TABLE IF NOT EXISTS inventory_journal (batch_key TEXT PRIMARY KEY, applied_at TEXT, reference TEXT)")
+        found = {
+            row[0] for row in con.execute(
+                f"SELECT batch_key FROM inventory_journal WHERE batch_key IN ({', '.join('?' for _ in keys)})", keys
+            )
+        }
+    con.close()
+    return found
+
+
+def journal_record(keys, reference: str = "", db_path: str = DB_PATH):
+    """Marque des lignes d'ajustement comme appliquées (idempotence en cas de relance)."""
+    applied_at = pd.Timestamp.now(tz="UTC").isoformat()
+    with _connect(db_path) as con:
+        con.execute("CREATE TABLE IF NOT EXISTS inventory_journal (batch_key TEXT PRIMARY KEY, applied_at TEXT, reference TEXT)")
+        con.executemany(
+            "INSERT OR REPLACE INTO inventory_journal (batch_key, applied_at, reference) VALUES (?, ?, ?)",
+            [(key, applied_at, reference) for key in keys],
+        )
+    con.close()
+
+
+def import_csv(csv_path: str = CSV_PATH, db_path: str = DB_PATH) -> bool:
+    """Initialise la base SQLite depuis l'ancien CSV (une seule fois)."""
+    if os.path.exists(db_path) or not os.path.exists(csv_path):
+        return False
+    save_catalog(pd.read_csv(csv_path), db_path)
+    return True
+
+
+def _read_products(db_path: str) -> pd.DataFrame:
+    con = sqlite3.connect(db_path)
+    try:
+        return _from_sql_frame(pd.read_sql("SELECT * FROM products", con))
+    finally:
+        con.close()
+
+
+def load_catalog(db_path: str = DB_PATH, csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """
+    Catalogue complet au format compact (voir ``product_model``) ; relu uniquement
+    si le fichier SQLite a changé. Renvoie une copie superficielle : les données
+    sont partagées par toutes les sessions, ajouter une colonne ne touche pas le cache.
+    Un DataFrame vide est renvoyé s'il n'existe encore aucune base.
+    """
+    import_csv(csv_path, db_path)
+    key = _file_key(db_path)
+    if key is None:
+        return pd.DataFrame()
+    with _cache_lock:
+        cached = _cache.get(db_path)
+        if cached is None or cached[0] != key:
+            df = compact_catalog(_read_products(db_path))
+            # Version du fichier lu : les index dérivés (recherche...) sont partagés par version
+            df.attrs["catalog_version"] = (db_path, *key)
+            cached = (key, df)
+            _cache[db_path] = cached
+    return cached[1].copy(deep=False)
+
+
+def catalog_memory_report(db_path: str = DB_PATH, csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """
+    Mémoire du catalogue par colonne : table brute (object) / modèle compact.
+    Les deux sont construits depuis une relecture fraîche, pour que les caches
+    internes des chaînes (UTF-8 calculé à l'affichage) ne faussent pas la mesure.
+    Le rapport est gardé par version du fichier, comme le catalogue : un rerun ne relit rien.
+    """
+    import_csv(csv_path, db_path)
+    key = _file_key(db_path)
+    if key is None:
+        return pd.DataFrame()
+    with _cache_lock:
+        cached = _reports.get(db_path)
+        if cached is None or cached[0] != key:
+            raw = _read_products(db_path)
+            cached = (key, memory_report(raw, compact_catalog(raw)))
+            _reports[db_path] = cached
+    return cached[1]
+
+
+def read_meta(db_path: str = DB_PATH, csv_path: str = CSV_PATH) -> dict:
+    """Métadonnées (row_count, max_updated_at...) sans charger la table produits."""
+    import_csv(csv_path, db_path)
+    if not os.path.exists(db_path):
+        return {}
+    con = sqlite3.connect(db_path)
+    try:
+        return dict(con.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        con.close()
+
+
+def last_updated(meta: dict):
+    """``max_updated_at`` des métadonnées en Timestamp (UTC), ou None."""
+    value = (meta or {}).get("max_updated_at")
+    return pd.Timestamp(value) if value else None
+
+
+def watermark(meta: dict):
+    """Point de reprise de la synchro incrémentale (``watermark``, sinon ``max_updated_at``)."""
+    value = (meta or {}).get("watermark")
+    return pd.Timestamp(value) if value else last_updated(meta)
+
+
+def invalidate(db_path: str = DB_PATH):
+    with _cache_lock:
+        _cache.pop(db_path, None)
+        _reports.pop(db_path, None)
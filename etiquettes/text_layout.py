@@ -0,0 +1,69 @@
+"""
+Mise en page du texte des étiquettes : coupure des lignes selon la largeur réelle
+des glyphes (et non un nombre de caractères), mesures mémorisées.
+
+Les marques, titres et descriptions se répètent d'une étiquette à l'autre : chaque
+(texte, police, taille) n'est mesuré qu'une fois par processus.
+"""
+from functools import lru_cache
+
+from reportlab.pdfbase import pdfmetrics
+
+ELLIPSIS = "..."
+
+
+@lru_cache(maxsize=65536)
+def string_width(text: str, font: str, size: float) -> float:
+    return pdfmetrics.stringWidth(text, font, size)
+
+
+def _split_long_word(word: str, font: str, size: float, max_width: float) -> list:
+    # Mot plus large que la ligne : coupé au caractère près
+    parts, current = [], ""
+    for char in word:
+        if current and string_width(current + char, font, size) > max_width:
+            parts.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _fit_with_ellipsis(line: str, font: str, size: float, max_width: float) -> str:
+    line = line.rstrip()
+    while line and string_width(line + ELLIPSIS, font, size) > max_width:
+        line = line[:-1].rstrip()
+    return line + ELLIPSIS
+
+
+@lru_cache(maxsize=8192)
+def wrap_text(text: str, font: str, size: float, max_width: float, max_lines: int = None) -> tuple:
+    """
+    Lignes de ``text`` tenant chacune dans ``max_width`` points.
+    Au-delà de ``max_lines``, la dernière ligne est tronquée et finit par « ... ».
+    """
+    space = string_width(" ", font, size)
+    lines, current, current_width = [], "", 0.0
+    for word in str(text).split():
+        word_width = string_width(word, font, size)
+        if current and current_width + space + word_width <= max_width:
+            current += " " + word
+            current_width += space + word_width
+            continue
+        if current:
+            lines.append(current)
+        if word_width > max_width:
+            *full, current = _split_long_word(word, font, size, max_width)
+            lines.extend(full)
+            current_width = string_width(current, font, size)
+        else:
+            current, current_width = word, word_width
+    if current:
+        lines.append(current)
+
+    if max_lines is not None and len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = _fit_with_ellipsis(lines[-1], font, size, max_width)
+    return tuple(lines)
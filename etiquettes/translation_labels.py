@@ -0,0 +1,130 @@
+"""
+Étiquettes de traduction 5 × 5 cm (onglet « Étiquettes de traduction Boutique »).
+
+Texte (cadres ReportLab) et icônes (PAO, tri, logo) sont dessinés sur le même
+canvas, une page par produit ; les icônes sont partagées par tout le document.
+"""
+import os
+from io import BytesIO
+
+import pandas as pd
+from reportlab.lib.colors import black
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Frame, KeepInFrame, Paragraph, Spacer
+from reportlab.platypus.flowables import HRFlowable
+
+from .assets import DocumentIcons, asset_path
+from .prepare import icon_records
+from .render_cache import render_pages_cached, row_keys
+
+LABEL_SIZE = (141.73, 141.73)  # 5 × 5 cm
+
+# Champs lus par _draw_label ; changer la mise en page = incrémenter LAYOUT_VERSION
+LAYOUT_FIELDS = [
+    "Vendor", "Title", "custom.mini_description", "custom.taille",
+    "custom.utilisation", "custom.periode_mois", "custom.texte_recyclage",
+]
+LAYOUT_VERSION = "traduction-5x5/1"
+
+title_style = ParagraphStyle('title_style', fontName='Helvetica', fontSize=6, alignment=TA_CENTER, leading=5)
+subtitle_style = ParagraphStyle('subtitle_style', fontName='Helvetica', fontSize=5, alignment=TA_CENTER, leading=5.0)
+text_style = ParagraphStyle('text_style', fontName='Helvetica', fontSize=5, alignment=0, leading=4.8)
+small_text_style = ParagraphStyle('small_text', fontName='Helvetica', fontSize=4.5, alignment=0, leading=4.6)
+
+
+def label_name(row) -> str:
+    """« Vendor - Title », utilisé pour la sélection et le nom du fichier."""
+    return f"{row.get('Vendor', '')} - {row.get('Title', '')}"
+
+
+def _draw_label(c, icons, row):
+    """
+    Dessine une étiquette sur la page courante : blocs de texte puis icônes (PAO, tri, logo).
+    ``row`` : ligne de ``icon_records`` (icônes PAO / tri déjà choisies).
+    """
+    # Préparer les blocs (Paragraphs)
+    title_story = [Paragraph(f"<b>{row.get('Vendor', '')} - {row.get('Title', '')}</b>", title_style)]
+
+    mini_desc = str(row.get("custom.mini_description", ""))
+    taille = str(row.get("custom.taille", ""))
+    description = f"{mini_desc} - {taille}" if taille and taille.lower() != "nan" else mini_desc
+    desc_story = [Paragraph(description, subtitle_style)]
+
+    util = str(row.get("custom.utilisation", ""))
+    if util and util.lower() != 'nan':
+        util_para = Paragraph(f"<b>Utilisation :</b> {util[:510]}..." if len(util) > 510 else f"<b>Utilisation :</b> {util}", text_style)
+        separator_top = HRFlowable(width="100%", thickness=0.5, color=black, spaceBefore=0, spaceAfter=0)
+
+        wrapped_util = KeepInFrame(135.73, 46, [separator_top, util_para, Spacer(1, 2)], mode='truncate')
+        util_story = [wrapped_util]
+    else:
+        util_story = []
+
+    warning_text = "<b>Avertissement !</b> Usage externe uniquement. Éviter tout contact avec les yeux. Tenir hors de portée des enfants. En cas d’apparition de rougeurs, de gonflements ou de démangeaisons pendant ou après l’utilisation, consultez un médecin. <b>A consommer de préférence avant le / Numéro de lot :</b> indiqué sur l’emballage"
+    if len(warning_text) > 400:
+        warning_text = warning_text[:400] + "..."
+    warning_para = Paragraph(warning_text, small_text_style)
+    separator_bottom = HRFlowable(width="100%", thickness=0.5, color=black, spaceBefore=0, spaceAfter=0)
+    wrapped_warning = KeepInFrame(135.73, 253, [separator_bottom, warning_para, Spacer(1, 1),separator_bottom], mode='truncate')
+    warning_story = [wrapped_warning]
+
+    vendor_text = row.get("Vendor", "")
+    info_text = f"<b>Fabricant :</b> {vendor_text} EU RP : Emmanuelle Kueny - Yoomi K-Beauty, 19 rue mercière, 68100 Mulhouse, France - 03 65 67 40 62 Distributeur : ABW, 5/F, KC100, 100 Kwai Cheong Road, Kwai Chung, New territories, HongKong. <b>Fabriqué en Corée</b>"
+    if len(info_text) > 400:
+        info_text = info_text[:400] + "..."
+    info_para = Paragraph(info_text, small_text_style)
+    wrapped_info = KeepInFrame(135.73, 25, [info_para, Spacer(1, 2)], mode='truncate')
+    info_story = [wrapped_info]
+
+    website_info = [Paragraph("www.yoomishop.fr", small_text_style)]
+
+    # Regrouper les frames et contenus
+    frames_and_stories = [
+        (Frame(3, 123,135.73, 15, showBoundary=0, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0), title_story),
+        (Frame(3, 111, 135.73, 15, showBoundary=0, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0), desc_story),
+        (Frame(3, 69, 135.73, 46, showBoundary=0, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0), util_story),
+        (Frame(3, 43, 135.73, 27, showBoundary=0, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0), warning_story),
+        (Frame(3, 20, 135.73, 25, showBoundary=0, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0), info_story),
+        (Frame(102, -18, 135.73, 28, showBoundary=0, leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0), website_info),
+    ]
+
+    for frame, story in frames_and_stories:
+        frame.addFromList(story, c)
+
+    logo_icon = "logo.png"
+
+    for icon, x, y, width, height in (
+        (row["_pao_icon"], 80, 5, 20, 20),
+        (row["_tri_icon"], 1, 5, 80, 20),
+        (logo_icon, 99, 11, 40, 14),
+    ):
+        try:
+            if os.path.exists(asset_path("icones", icon)):
+                icons.draw(asset_path("icones", icon), x, y, width, height, preserveAspectRatio=False)
+        except Exception:
+            pass
+
+
+def render_translation_labels(df: pd.DataFrame) -> bytes:
+    """Un seul PDF, une page 5 × 5 cm par produit, rendu en une passe sur le même canvas."""
+    buffer = BytesIO()
+    c = Canvas(buffer, pagesize=LABEL_SIZE)
+    icons = DocumentIcons(c)
+    for row in icon_records(df):
+        _draw_label(c, icons, row)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def render_translation_label(row) -> bytes:
+    """PDF d'une étiquette de traduction pour une ligne de la base produits."""
+    return render_translation_labels(pd.DataFrame([row]))
+
+
+def render_translation_labels_cached(df: pd.DataFrame, cache=None) -> bytes:
+    """Comme ``render_translation_labels``, mais seules les lignes modifiées sont re-rendues."""
+    keys = row_keys(df, LAYOUT_FIELDS, LAYOUT_VERSION)
+    return render_pages_cached(df, keys, render_translation_labels, cache)
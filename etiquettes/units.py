@@ -0,0 +1,97 @@
+"""
+Quantités des fichiers fournisseurs (poids, contenances), par colonnes entières.
+
+Chaque fonction prend une Series de textes et renvoie des colonnes typées
+(``float64`` pour les quantités, ``category`` pour les unités) en une passe
+``Series.str.extract`` : l'expression compilée tourne en C sur toute la
+colonne au lieu d'un appel Python par cellule.
+"""
+import re
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+# Facteurs vers l'unité de base : grammes pour les masses, millilitres pour les volumes
+GRAMS = {"mg": 0.001, "g": 1.0, "kg": 1000.0, "oz": 28.349523125, "lb": 453.59237}
+MILLILITRES = {"ml": 1.0, "cl": 10.0, "l": 1000.0}
+
+WEIGHT_PATTERN = re.compile(r"(?P<qty>\d+(?:[.,]\d+)?)\s*(?P<unit>kg|g|oz|lb)\b", re.IGNORECASE)
+
+SIZE_UNITS = r"ml|g|kg|l|cl|mg|oz"
+# Dernière « quantité + unité » du texte : le préfixe gourmand recule jusqu'au dernier
+# nombre entier (pas de départ au milieu de « 12.5 »), comme le dernier re.finditer.
+_LAST_SIZE = (
+    r"^(?P<before>.*)(?<!\d)(?<!\d[.,])(?P<qty>\d+(?:[.,]\d+)?)\s*(?P<unit>{units})\b(?P<after>.*)$"
+)
+
+
+def as_text(series: pd.Series) -> pd.Series:
+    """Textes de la colonne, chaîne vide pour les cellules manquantes."""
+    return series.astype(object).where(series.notna(), "").astype(str)
+
+
+def quantities(qty: pd.Series) -> pd.Series:
+    """'1,5' -> 1.5 ; NaN si absent."""
+    return pd.to_numeric(qty.str.replace(",", ".", regex=False), errors="coerce").astype("float64")
+
+
+def to_base_unit(qty: pd.Series, unit: pd.Series) -> pd.Series:
+    """Quantité en grammes (masses) ou millilitres (volumes) ; NaN pour une unité inconnue."""
+    factors = unit.astype(object).str.lower().map({**GRAMS, **MILLILITRES}).astype("float64")
+    return qty * factors
+
+
+def weights_to_grams(series: pd.Series) -> pd.Series:
+    """'208g', '0.2 kg', '7 oz', '1 lb' -> grammes (float, NaN si illisible)."""
+    found = as_text(series).str.extract(WEIGHT_PATTERN)
+    return to_base_unit(quantities(found["qty"]), found["unit"]).rename(series.name)
+
+
+def last_size(text: pd.Series, units: str = SIZE_UNITS, flags: int = re.IGNORECASE) -> pd.DataFrame:
+    """
+    Dernière contenance de chaque texte : colonnes ``before`` / ``after`` (texte autour,
+    vide si aucune), ``Size`` ('150 ml'), ``Size Qty`` (float), ``Size Unit`` (catégorie).
+    """
+    pattern = re.compile(_LAST_SIZE.format(units=units), flags | re.DOTALL)
+    text = as_text(text)
+    found = text.str.extract(pattern)
+    matched = found["qty"].notna()
+    qty = found["qty"].str.replace(",", ".", regex=False)
+    unit = found["unit"].str.lower()
+    return pd.DataFrame({
+        "matched": matched,
+        "before": found["before"].where(matched, text),
+        "after": found["after"].fillna(""),
+        "Size": (qty + " " + unit).fillna(""),
+        "Size Qty": quantities(found["qty"]),
+        "Size Unit": unit.astype("category"),
+    }, index=text.index)
+
+
+def size_columns(sizes: pd.DataFrame) -> pd.DataFrame:
+    """Colonnes typées d'une contenance : Size, Size Qty, Size Unit, Size (g/ml)."""
+    out = sizes[["Size", "Size Qty", "Size Unit"]].copy()
+    out["Size (g/ml)"] = to_base_unit(out["Size Qty"], out["Size Unit"])
+    return out
+
+
+SMALL_WORDS = {'de', 'du', 'des', 'la', 'le', 'les', 'et', 'ou', 'à', 'au', 'aux',
+               'the', 'of', 'for', 'and', 'in', 'on', 'with'}
+
+
+def smart_title(text: pd.Series) -> pd.Series:
+    """
+    Title-case « doux » : sigles courts gardés (AHA, SPF), petits mots en minuscules
+    sauf en début / fin, le reste capitalisé. Tous les mots de la colonne en une passe.
+    """
+    words = text.reset_index(drop=True).str.split().explode().dropna()
+    per_row = np.bincount(words.index.to_numpy(dtype=np.int64), minlength=len(text))
+    position = words.groupby(level=0).cumcount().to_numpy()
+    count = per_row[words.index.to_numpy(dtype=np.int64)]
+    lower = words.str.lower()
+    keep = (words.str.isupper() & (words.str.len() <= 4)).to_numpy()
+    small = lower.isin(SMALL_WORDS).to_numpy() & (position > 0) & (position < count - 1)
+    cased = iter(np.where(keep, words, np.where(small, lower, words.str.capitalize())).tolist())
+    # Les mots d'une même ligne se suivent : on les recolle par paquets de ``per_row``
+    return pd.Series([" ".join(islice(cased, n)) for n in per_row], index=text.index, dtype=object)